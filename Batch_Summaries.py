@@ -0,0 +1,188 @@
+from argparse import ArgumentParser
+from functools import partial
+import os
+import time
+import traceback
+from os.path import getsize, isdir, join
+from typing import List, NamedTuple, Optional
+
+import Summary_Maker
+from Frame_IO import FORMATS
+from Statement_Cache import StatementCache, file_hash
+
+
+class PortfolioResult(NamedTuple):
+    """Outcome of the summaries of one portfolio."""
+    root: str
+    files: int
+    bytes: int
+    rows: int
+    seconds: float
+    # Message of the exception that stopped the portfolio, None if it succeeded
+    error: Optional[str] = None
+    # Files left out of the master because they could not be parsed
+    failed_files: int = 0
+
+
+def run_batch(
+        roots: List[str],
+        workers: int = 1,
+        concise: bool = False,
+        output_format: str = 'csv',
+        cache: bool = True
+    ) -> List[PortfolioResult]:
+    """Build the summaries of many portfolios in one process or a pool of processes.
+
+    Every portfolio is a folder with its own broker folders. Its master and concise files are
+    written into that folder, and a failed portfolio gets an error.log there without stopping
+    the others. Roots that are not folders or have no broker folders fail without being built. Files of a portfolio that can't be parsed are left out of its master and listed
+    in its parse_failures.json.
+
+    Args:
+        roots (List[str]): Folders of the portfolios.
+        workers (int, optional): Number of portfolios built at the same time, each in its own
+            process. Defaults to 1 (all in this process).
+        concise (bool, optional): Also write the concise summaries. Defaults to False.
+        output_format (str, optional): Format of the written files, one of Frame_IO.FORMATS. Defaults to 'csv'.
+        cache (bool, optional): Keep a cache of parsed files in every portfolio. Defaults to True.
+
+    Returns:
+        List[PortfolioResult]: The result of every portfolio, in the order of the roots.
+    """
+    build = partial(
+        build_portfolio,
+        concise=concise,
+        output_format=output_format,
+        # Parser changes invalidate the caches
+        cache_version=file_hash(Summary_Maker.__file__) if cache else None
+    )
+
+    if workers <= 1 or len(roots) <= 1:
+        return [build(root) for root in roots]
+
+    # Imported here, loading multiprocessing slows down the runs that don't need it
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(workers, len(roots))) as executor:
+        return list(executor.map(build, roots))
+
+
+def build_portfolio(
+        root: str,
+        concise: bool = False,
+        output_format: str = 'csv',
+        cache_version: Optional[str] = None
+    ) -> PortfolioResult:
+    """Build the summaries of one portfolio. Module level so that it can be sent to worker processes.
+
+    Args:
+        root (str): Folder of the portfolio.
+        concise (bool, optional): Also write the concise summary. Defaults to False.
+        output_format (str, optional): Format of the written files. Defaults to 'csv'.
+        cache_version (Optional[str], optional): Version of the parsers for the cache of parsed files
+            in the portfolio. Defaults to None (no cache).
+
+    Returns:
+        PortfolioResult: The outcome.
+    """
+    if not isdir(root):
+        return PortfolioResult(root, 0, 0, 0, 0.0, f'{root} is not a folder')
+
+    broker_paths: List[str] = [path for path in Summary_Maker.portfolio_paths(root).values() if isdir(path)]
+    if len(broker_paths) == 0:
+        # Only the bank rows would be in the master
+        return PortfolioResult(root, 0, 0, 0, 0.0, f'No broker folders in {root}')
+
+    error_log = join(root, 'error.log')
+    failures: List[Summary_Maker.ParseFailure] = []
+    files: List[str] = []
+    nbytes: int = 0
+    start = time.perf_counter()
+    try:
+        if os.path.exists(error_log):
+            os.remove(error_log)
+
+        files = [f for path in broker_paths for f in Summary_Maker.list_files(path)]
+        nbytes = sum(getsize(f) for f in files)
+
+        master = Summary_Maker.main(
+            cache=StatementCache(join(root, '.summary_cache'), version=cache_version)
+            if cache_version is not None else None,
+            concise=concise,
+            output_format=output_format,
+            root=root,
+            failures=failures
+        )
+    except Exception as e:
+        traceback.print_exc()
+        try:
+            with open(error_log, 'w', encoding='utf-8') as error_file:
+                error_file.write(str(e))
+        except OSError:
+            # The folder went away or can't be written, the result still has the error
+            pass
+        return PortfolioResult(root, len(files), nbytes, 0, time.perf_counter() - start, str(e), len(failures))
+
+    return PortfolioResult(
+        root, len(files), nbytes, master.shape[0], time.perf_counter() - start, failed_files=len(failures))
+
+
+def print_results(results: List[PortfolioResult], seconds: float):
+    """Print the result of every portfolio and the throughput of the batch.
+
+    Args:
+        results (List[PortfolioResult]): The results.
+        seconds (float): Wall time of the whole batch.
+    """
+    print(f'{"portfolio":<40}{"files":>7}{"rows":>10}{"seconds":>10}  status')
+    for result in results:
+        print(
+            f'{result.root:<40}{result.files:>7}{result.rows:>10}{result.seconds:>10.2f}  '
+            f'{_status(result)}'
+        )
+
+    rows = sum(result.rows for result in results)
+    nbytes = sum(result.bytes for result in results)
+    failed = sum(result.error is not None for result in results)
+    print(
+        f'{len(results)} portfolios ({failed} failed) in {seconds:.2f}s: '
+        f'{len(results) / seconds:.2f} portfolios/s, {rows / seconds:,.0f} rows/s, {nbytes / 1e6 / seconds:.2f} MB/s'
+    )
+
+
+def _status(result: PortfolioResult) -> str:
+    if result.error is not None:
+        return 'failed: ' + result.error
+    if result.failed_files > 0:
+        return f'ok, {result.failed_files} files not parsed'
+    return 'ok'
+
+
+if (__name__ == "__main__"):
+    arg_parser = ArgumentParser(description='Create the summaries of many portfolios in one run.')
+    arg_parser.add_argument('roots', nargs='+', help='folders of the portfolios, each with its own broker folders')
+    arg_parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='number of portfolios built at the same time (default: 1)'
+    )
+    arg_parser.add_argument('--concise', action='store_true', help='also create the concise summaries')
+    arg_parser.add_argument(
+        '--format',
+        choices=list(FORMATS),
+        default='csv',
+        help='format of the master and concise files (default: csv)'
+    )
+    arg_parser.add_argument('--no-cache', action='store_true', help='parse every file again')
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_batch(
+        args.roots,
+        workers=args.workers,
+        concise=args.concise,
+        output_format=args.format,
+        cache=not args.no_cache
+    )
+    print_results(results, time.perf_counter() - start)
@@ -0,0 +1,236 @@
+from argparse import ArgumentParser
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from os.path import getsize, join
+from typing import Callable, Dict, List, NamedTuple
+
+import pandas as pd
+
+import Concise_Maker
+import Summary_CLI
+import Summary_Maker
+from Synthetic_Statements import write_portfolio
+
+
+class BenchmarkResult(NamedTuple):
+    """Measurements of one benchmarked stage."""
+    name: str
+    # Best wall time of the repeats
+    seconds: float
+    rows: int
+    bytes: int
+    # Peak memory allocated during the stage
+    peak_bytes: int
+
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds > 0 else float('inf')
+
+
+def measure(name: str, stage: Callable[[], object], rows: int, nbytes: int = 0, repeat: int = 3) -> BenchmarkResult:
+    """Time a stage and measure its peak memory.
+
+    The memory is measured in a separate run because tracing the allocations slows the stage down.
+
+    Args:
+        name (str): Name of the stage.
+        stage (Callable[[], object]): The stage to run.
+        rows (int): Number of rows the stage processes.
+        nbytes (int, optional): Number of input bytes the stage processes. Defaults to 0.
+        repeat (int, optional): Number of timed runs, the best one is kept. Defaults to 3.
+
+    Returns:
+        BenchmarkResult: The measurements.
+    """
+    seconds: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(name, min(seconds), rows, nbytes, peak)
+
+
+def run_benchmarks(root: str, rows: int, files: int, repeat: int = 3) -> List[BenchmarkResult]:
+    """Generate a synthetic portfolio and benchmark the parsers, the layout reader, the master build and the concise summary.
+
+    The layout reader is timed on the Canaccord workbook and CSV exports, and the master is also
+    built with the arrow engine when pyarrow is installed.
+
+    Args:
+        root (str): Folder to generate the portfolio in.
+        rows (int): Number of positions per file.
+        files (int): Number of files per broker.
+        repeat (int, optional): Number of timed runs per stage. Defaults to 3.
+
+    Returns:
+        List[BenchmarkResult]: The measurements of every stage.
+    """
+    written = write_portfolio(root, rows, files)
+    results: List[BenchmarkResult] = []
+
+    file_parsers = [
+        ('Fidelity', Summary_Maker.parse_fidelity_file),
+        ('Etrade', Summary_Maker.parse_etrade_file),
+        ('Canaccord', Summary_Maker.parse_canaccord_file),
+        ('Schwab', Summary_Maker.parse_schwab_file)
+    ]
+    for folder, parser in file_parsers:
+        paths = written[folder]
+        results.append(measure(
+            parser.__name__,
+            lambda: [parser(f) for f in paths],
+            rows * len(paths),
+            sum(getsize(f) for f in paths),
+            repeat
+        ))
+
+    reader = Summary_Maker.LAYOUT_READERS['canaccord']
+    for f in written['Canaccord'][:2]:
+        results.append(measure(
+            'LayoutReader.parse ' + os.path.splitext(f)[1][1:],
+            lambda: reader.parse(f),
+            rows,
+            getsize(f),
+            repeat
+        ))
+
+    total_rows = rows * files * len(file_parsers)
+    total_bytes = sum(getsize(f) for paths in written.values() for f in paths)
+    paths = {broker: join(root, folder) for broker, folder in Summary_Maker.DEFAULT_PATHS.items()}
+    results.append(measure(
+        'master build',
+        lambda: Summary_Maker.build_master(paths),
+        total_rows,
+        total_bytes,
+        repeat
+    ))
+
+    master = Summary_Maker.build_master(paths)
+
+    if Summary_Maker.resolve_engine('arrow') == 'arrow':
+        results.append(measure(
+            'master build arrow',
+            lambda: Summary_Maker.build_master(paths, engine='arrow'),
+            total_rows,
+            total_bytes,
+            repeat
+        ))
+
+    results.append(measure(
+        'create_concise',
+        lambda: Concise_Maker.build_concise(master),
+        master.shape[0],
+        repeat=repeat
+    ))
+
+    return results
+
+
+def measure_import(module: str) -> Dict[str, int]:
+    """Measure the import time of a module in a new interpreter with python -X importtime.
+
+    Args:
+        module (str): Name of the module.
+
+    Returns:
+        Dict[str, int]: Cumulative import time in microseconds of the module and of every module it imported.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True
+    )
+
+    times: Dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+def check_startup() -> bool:
+    """Print the import time of the command line entry point and check it against its budget.
+
+    Returns:
+        bool: True if the import time is within Summary_CLI.IMPORT_BUDGET_US and numpy and pandas
+        are not imported.
+    """
+    times = measure_import('Summary_CLI')
+    heavy = [module for module in ('numpy', 'pandas') if module in times]
+    within_budget = times['Summary_CLI'] <= Summary_CLI.IMPORT_BUDGET_US and len(heavy) == 0
+
+    print(
+        f'import Summary_CLI: {times["Summary_CLI"] / 1e3:.1f} ms '
+        f'(budget {Summary_CLI.IMPORT_BUDGET_US / 1e3:.1f} ms), '
+        f'{"imports " + " and ".join(heavy) if heavy else "no numpy or pandas"}: '
+        f'{"ok" if within_budget else "over budget"}'
+    )
+    return within_budget
+
+
+def print_results(results: List[BenchmarkResult]):
+    """Print the measurements as a table."""
+    print(f'{"stage":<24}{"seconds":>10}{"rows/s":>14}{"MB/s":>10}{"peak MB":>10}')
+    for result in results:
+        print(
+            f'{result.name:<24}{result.seconds:>10.4f}{result.rows_per_second():>14,.0f}'
+            f'{result.megabytes_per_second():>10.2f}{result.peak_bytes / 1e6:>10.2f}'
+        )
+
+
+if (__name__ == "__main__"):
+    arg_parser = ArgumentParser(
+        description='Benchmark Summary_Maker.py and Concise_Maker.py on synthetic broker exports.')
+    arg_parser.add_argument('--rows', type=int, default=1000, help='positions per file (default: 1000)')
+    arg_parser.add_argument('--files', type=int, default=4, help='files per broker (default: 4)')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (default: 3)')
+    arg_parser.add_argument('--dir', help='folder to generate the exports in (default: a temporary folder)')
+    arg_parser.add_argument('--json', metavar='PATH', help='also write the measurements to a JSON file')
+    arg_parser.add_argument(
+        '--startup',
+        action='store_true',
+        help='only check the import time of Summary_CLI.py against its budget, exit with 1 if it is over'
+    )
+    args = arg_parser.parse_args()
+
+    if args.startup:
+        sys.exit(0 if check_startup() else 1)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root: str = args.dir if args.dir is not None else temp_dir
+        results = run_benchmarks(root, args.rows, args.files, args.repeat)
+
+    print_results(results)
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as fw:
+            json.dump({
+                'rows': args.rows,
+                'files': args.files,
+                'pandas': pd.__version__,
+                'results': [
+                    dict(result._asdict(),
+                         rows_per_second=result.rows_per_second(),
+                         megabytes_per_second=result.megabytes_per_second())
+                    for result in results
+                ]
+            }, fw, indent=2)
@@ -2,20 +2,72 @@ import numpy as np
 import pandas as pd
 from os import listdir
 from os.path import isfile, join
-from datetime import date
+from datetime import date, datetime
 import re
-from sys import argv
+from argparse import ArgumentParser
 
-def main():
-    # Find all of the files in current dir
-    files = [f for f in listdir(".") if isfile(f)]
-    # Filter out all files in current dir so there is only the summary master left
-    files = [f for f in files if "Summary_Master_" in f]
+from Frame_IO import FORMATS, read_frame, write_frame
+from Symbol_Index import INDEX_FILE, OPTION, SymbolIndex
 
-    master = pd.read_csv(files[0], usecols=np.arange(0, 10))
+def main(output_format="csv"):
+    master = read_master(find_master("."))
 
-    # create concise summary file
-    concise = pd.DataFrame(columns = [
+    # types of the symbols seen in earlier runs are read from the index, new ones are added to it
+    symbolIndex = SymbolIndex(INDEX_FILE)
+    concise = build_concise(master, symbolIndex)
+    symbolIndex.save()
+
+    today = date.today()
+
+    write_frame(concise, "Concise_" + today.strftime("%b-%d-%Y"), output_format)
+
+# reads a summary master file with the account, symbol and description as categories
+def read_master(path):
+    if not path.lower().endswith(".csv"):
+        # binary masters keep their dtypes, an xlsx master has plain text columns
+        master = read_frame(path)
+        master = master[master.columns[0:10]]
+        return master.astype({column : "category" for column in master.columns[0:3]})
+
+    columns = pd.read_csv(path, nrows=0).columns
+
+    return pd.read_csv(path, usecols=np.arange(0, 10), dtype={
+    columns[0] : "category", # Account Name/Number
+    columns[1] : "category", # Symbol
+    columns[2] : "category" # Description
+    })
+
+# finds the newest summary master file in a directory, in any of the output formats
+def find_master(directory):
+    # Find all of the files in the dir
+    files = [f for f in listdir(directory) if isfile(join(directory, f))]
+    # Filter out all files in the dir so there are only the summary masters left
+    masters = []
+    for f in files:
+        match = re.fullmatch("Summary_Master_(.+)\\.(csv|parquet|feather|xlsx)", f)
+        if match is None:
+            continue
+        try:
+            masters.append((datetime.strptime(match.group(1), "%b-%d-%Y"), f))
+        except ValueError:
+            continue
+
+    if len(masters) == 0:
+        raise FileNotFoundError("No Summary_Master_<date> file in " + directory)
+
+    return join(directory, max(masters)[1])
+
+# creates the concise DataFrame from a master DataFrame, either read from the master csv or built in memory
+# the symbols are classified with the given symbol index, or an index kept in memory
+def build_concise(master, symbolIndex=None):
+    # empty cells are read from the master csv as missing values, do the same for a master built in memory
+    master = master.replace("", np.nan)
+
+    return create_concise(empty_concise(master), master, symbolIndex)
+
+# creates the empty concise DataFrame with the columns for the master DataFrame
+def empty_concise(master):
+    return pd.DataFrame(columns = [
     master.columns[1], # Symbol
     master.columns[2], # Description
     master.columns[3], # Quantity
@@ -30,85 +82,164 @@ def main():
     "Type Total"
     ])
 
-    concise = create_concise(concise, master)
-
-    today = date.today()
-
-    concise.to_csv("Concise_" + today.strftime("%b-%d-%Y") + ".csv", index=False)
-
 # creates the concise DataFrame from the master DateFrame
-def create_concise(concise, master):
-    # Get unique stock symbols
-    symbols = master.Symbol.unique()
-    # if there is no symbol get rid of it
-    symbols = [symbols[i] for i in range(len(symbols)) if type(symbols[i]) is str]
-    # get rid of all symbols that contain numbers
-    # symbols = [symbols[i] for i in range(len(symbols)) if not any(char.isdigit() for char in symbols[i])]
+def create_concise(concise, master, symbolIndex=None):
+    # only keep the rows that have a symbol
+    hasSymbol = is_text(master[master.columns[1]])
 
     # total value of all positions
     totalValue = pd.to_numeric(master[master.columns[5]]).sum()
 
-    for i in range(len(symbols)):
-        # Description
-        des = master.loc[master[master.columns[1]] == symbols[i]] [master.columns[2]]
-
-        des = [d for d in des if d != ""]
-
-        # Calculate values for each stock
-        # sum the quantity
-        quan = float(master.loc[master[master.columns[1]] == symbols[i]][master.columns[3]].sum())
-
-        # find the min last price if there is more than one
-        # print(master.loc[master[master.columns[1]] == symbols[i]])
-        lpIndex = pd.to_numeric(master.loc[master[master.columns[1]] == symbols[i]][master.columns[4]]).idxmin()
-        if type(lpIndex) is float:
-            lp = "n/a"
-        else:
-            lp = master.at[int(lpIndex), master.columns[4]]
-
-        # sum the value of each position
-        val = float(pd.to_numeric(master.loc[master[master.columns[1]] == symbols[i]][master.columns[5]]).sum())
-
-        # sum total cost basis
-        cbt = float(pd.to_numeric(master.loc[master[master.columns[1]] == symbols[i]][master.columns[9]]).sum())
-
-        # cost basis average
-        if(quan != 0):
-            cba = cbt/quan
-
-            if (any(char.isdigit() for char in symbols[i])):
-                cba /= 100
-        else:
-            cba = "n/a"
-
-        # Total gain/loss dollar
-        tgld = val - cbt
-        if(cbt == 0):
-            tglp = "n/a"
-        else:
-            tglp = ((val - cbt)/cbt) * 100
-
-        # Position size
-        ps: float = (val / totalValue) * 100
-
-        # add to concise
-        temp = pd.DataFrame(data = {
-        concise.columns[0] : [symbols[i]], # Symbol
-        concise.columns[1] : [des[0]], # Description
-        concise.columns[2] : [quan], # Quantity
-        concise.columns[3] : [lp], # Last Price
-        concise.columns[4] : [val], # Current Value
-        concise.columns[5] : [tgld], # Total Gain/Loss Dollar
-        concise.columns[6] : [tglp], # Total Gain/Loss Percent
-        concise.columns[7] : [cba], # Cost Basis Average
-        concise.columns[8] : [cbt], # Cost Basis Total
-        concise.columns[9] : [ps] # Position size
-        })
-
-        concise = concise.append(temp, ignore_index=True)
-
-    return concise
+    symbolIndex = learn_symbols(symbolIndex, master.loc[hasSymbol])
+    positions = aggregate_positions(master.loc[hasSymbol])
+
+    return concise_from_positions(concise, positions, totalValue, symbolIndex.types(positions.index))
+
+# classifies the symbols of master rows that are new to the symbol index, makes an index in memory if there is none
+def learn_symbols(symbolIndex, master):
+    if symbolIndex is None:
+        symbolIndex = SymbolIndex()
+    symbolIndex.learn(master[master.columns[1]], master[master.columns[2]], master[master.columns[0]])
+    return symbolIndex
+
+# creates the concise DataFrame from the per-symbol positions, their types and the total value of the master
+def concise_from_positions(concise, positions, totalValue, types):
+    symbols = positions.index.to_series()
+
+    # positions columns: description, quantity, last price, value, total cost basis
+    quan = positions[positions.columns[1]]
+    val = positions[positions.columns[3]]
+    cbt = positions[positions.columns[4]]
+
+    # cost basis average, options are quoted per share but held in contracts of 100
+    isOption = (types == OPTION).to_numpy()
+    cba = (cbt / quan).where(~isOption, cbt / quan / 100).astype(object)
+    cba[quan == 0] = "n/a"
+
+    # Total gain/loss dollar
+    tgld = val - cbt
+    tglp = (((val - cbt) / cbt) * 100).astype(object)
+    tglp[cbt == 0] = "n/a"
+
+    # Position size
+    ps = (val / totalValue) * 100
+
+    # total value of all positions of the same type
+    typeTotal = val.groupby(types.to_numpy(), sort=False).transform("sum")
+
+    return pd.DataFrame(data = {
+    concise.columns[0] : symbols.values, # Symbol
+    concise.columns[1] : positions[positions.columns[0]].values, # Description
+    concise.columns[2] : quan.values, # Quantity
+    concise.columns[3] : positions[positions.columns[2]].values, # Last Price
+    concise.columns[4] : val.values, # Current Value
+    concise.columns[5] : tgld.values, # Total Gain/Loss Dollar
+    concise.columns[6] : tglp.values, # Total Gain/Loss Percent
+    concise.columns[7] : cba.values, # Cost Basis Average
+    concise.columns[8] : cbt.values, # Cost Basis Total
+    concise.columns[9] : ps.values, # Position size
+    concise.columns[10] : types.values, # Type
+    concise.columns[11] : typeTotal.values # Type Total
+    }, columns = concise.columns)
+
+# tells which cells of a column hold text, from the categories if the column is categorical
+def is_text(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # the code of missing values is -1, the last entry
+        textCategories = np.append(column.cat.categories.map(lambda value: type(value) is str).to_numpy(dtype=bool), False)
+        return pd.Series(textCategories[column.cat.codes.to_numpy()], index=column.index)
+
+    return column.map(lambda value: type(value) is str)
+
+# aggregates the master rows by symbol in one groupby pass, in order of first appearance
+def aggregate_positions(master):
+    symbol = master[master.columns[1]]
+    if isinstance(symbol.dtype, pd.CategoricalDtype):
+        symbol = symbol.cat.remove_unused_categories()
+    grouped = master.groupby(symbol, sort=False, observed=True)
+
+    # sum the quantity
+    quan = grouped[master.columns[3]].sum().astype(float)
+
+    # sum the value and total cost basis of each position
+    val = pd.to_numeric(master[master.columns[5]]).groupby(symbol, sort=False, observed=True).sum().astype(float)
+    cbt = pd.to_numeric(master[master.columns[9]]).groupby(symbol, sort=False, observed=True).sum().astype(float)
+
+    # first non-empty description
+    hasDes = master[master.columns[2]] != ""
+    des = master.loc[hasDes].drop_duplicates(subset=master.columns[1]).set_index(master.columns[1])[master.columns[2]]
+
+    # find the min last price if there is more than one
+    lpNum = pd.to_numeric(master[master.columns[4]])
+    lpIndex = lpNum[lpNum.notna()].groupby(symbol[lpNum.notna()], sort=False, observed=True).idxmin()
+    lp = pd.Series(master.loc[lpIndex.values, master.columns[4]].values, index=lpIndex.index, dtype=object)
+
+    # plain symbols and descriptions, they are categories for a categorical master
+    for series in [quan, val, cbt, des, lp]:
+        series.index = series.index.astype(object)
+    des = des.astype(object)
+
+    positions = pd.DataFrame(index=quan.index)
+    positions[master.columns[2]] = des.reindex(quan.index)
+    positions[master.columns[3]] = quan
+    positions[master.columns[4]] = lp.reindex(quan.index).fillna("n/a")
+    positions[master.columns[5]] = val
+    positions[master.columns[9]] = cbt
+
+    return positions
+
+# creates the concise DataFrame from chunks of master rows in order, only the running per-symbol positions are kept in memory
+def build_concise_chunked(chunks, symbolIndex=None):
+    concise = None
+    positions = None
+    totalValue = 0.0
+
+    for master in chunks:
+        master = master.replace("", np.nan)
+        if concise is None:
+            concise = empty_concise(master)
+
+        totalValue += pd.to_numeric(master[master.columns[5]]).sum()
+        hasSymbol = is_text(master[master.columns[1]])
+        symbolIndex = learn_symbols(symbolIndex, master.loc[hasSymbol])
+        positions = fold_positions(positions, master.loc[hasSymbol])
+
+    if concise is None:
+        raise ValueError("No master rows to build the concise summary from")
+
+    # last prices were kept as numbers to take the min across chunks
+    positions[positions.columns[2]] = positions[positions.columns[2]].astype(object).fillna("n/a")
+
+    return concise_from_positions(concise, positions, totalValue, symbolIndex.types(positions.index))
+
+# folds the positions of a chunk of master rows with a symbol into the running positions
+def fold_positions(positions, master):
+    chunk = aggregate_positions(master)
+    chunk[chunk.columns[2]] = pd.to_numeric(chunk[chunk.columns[2]], errors="coerce")
+
+    if positions is None:
+        return chunk
+
+    # new symbols go after the known ones, in order of first appearance
+    index = positions.index.append(chunk.index[~chunk.index.isin(positions.index)])
+    old = positions.reindex(index)
+    new = chunk.reindex(index)
+    isKnown = index.isin(positions.index)
+
+    folded = pd.DataFrame(index=index)
+    # the description of the first row of the symbol
+    folded[chunk.columns[0]] = old[chunk.columns[0]].where(isKnown, new[chunk.columns[0]])
+    # sums of the quantity, value and total cost basis
+    folded[chunk.columns[1]] = old[chunk.columns[1]].fillna(0) + new[chunk.columns[1]].fillna(0)
+    # min last price
+    folded[chunk.columns[2]] = np.fmin(old[chunk.columns[2]], new[chunk.columns[2]])
+    folded[chunk.columns[3]] = old[chunk.columns[3]].fillna(0) + new[chunk.columns[3]].fillna(0)
+    folded[chunk.columns[4]] = old[chunk.columns[4]].fillna(0) + new[chunk.columns[4]].fillna(0)
+
+    return folded
 
 
 if __name__ == "__main__":
-    main()
+    argParser = ArgumentParser(description="Build the concise summary from the newest summary master.")
+    argParser.add_argument("--format", choices=list(FORMATS), default="csv", help="format of the concise file (default: csv)")
+    main(argParser.parse_args().format)
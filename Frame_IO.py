@@ -0,0 +1,73 @@
+import os
+from typing import Dict
+
+import pandas as pd
+from pandas import DataFrame
+
+# File extension of every output format
+FORMATS: Dict[str, str] = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'xlsx': '.xlsx'
+}
+
+
+def write_frame(frame: DataFrame, stem: str, output_format: str = 'csv') -> str:
+    """Write a frame in one of the output formats.
+
+    Parquet and Feather keep the dtypes of the frame, including categories. They need typed
+    columns, so object columns that mix numbers with text such as "n/a" are written as numbers
+    with the text as missing values. Both need pyarrow.
+
+    Args:
+        frame (DataFrame): The frame to write.
+        stem (str): Path of the file without the extension.
+        output_format (str, optional): One of FORMATS. Defaults to 'csv'.
+
+    Returns:
+        str: Path of the written file.
+    """
+    path = stem + FORMATS[output_format]
+
+    if output_format == 'csv':
+        frame.to_csv(path, index=False)
+    elif output_format == 'xlsx':
+        frame.to_excel(path, index=False)
+    elif output_format == 'parquet':
+        _typed(frame).to_parquet(path, index=False)
+    elif output_format == 'feather':
+        _typed(frame).reset_index(drop=True).to_feather(path)
+
+    return path
+
+
+def read_frame(path: str) -> DataFrame:
+    """Read a frame written by write_frame, the format is taken from the extension.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        DataFrame: The frame.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == FORMATS['parquet']:
+        return pd.read_parquet(path)
+    if extension == FORMATS['feather']:
+        return pd.read_feather(path)
+    if extension == FORMATS['xlsx']:
+        return pd.read_excel(path)
+    return pd.read_csv(path)
+
+
+def _typed(frame: DataFrame) -> DataFrame:
+    frame = frame.copy()
+    for column in frame.columns:
+        if frame[column].dtype != object:
+            continue
+        values = frame[column].dropna()
+        if not values.map(lambda value: isinstance(value, str)).all():
+            frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    return frame
@@ -0,0 +1,152 @@
+from argparse import ArgumentParser
+from datetime import date, datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from Frame_IO import FORMATS, read_frame, write_frame
+from Summary_Maker import MasterColums
+
+# Columns a position is identified by
+KEY_COLUMNS: List[str] = [MasterColums.ACCOUNT_NAME.value, MasterColums.SYMBOL.value]
+
+# Columns compared between the two masters
+DELTA_COLUMNS: List[str] = [
+    MasterColums.QUANTITY.value,
+    MasterColums.CURRENT_VALUE.value,
+    MasterColums.TOTAL_COST_BASIS.value
+]
+
+# Name of the column telling if a position was added, removed or changed
+CHANGE_COLUMN: str = 'Change'
+ADDED: str = 'added'
+REMOVED: str = 'removed'
+CHANGED: str = 'changed'
+
+
+def diff_masters(old: DataFrame, new: DataFrame, tolerance: float = 1e-9) -> DataFrame:
+    """Find the positions added, removed and changed between two masters.
+
+    Positions are keyed by account and symbol; the rows of a position are summed first. The
+    two masters are joined on the key with one hash merge, so the time and memory grow with
+    the number of rows instead of comparing every row with every other.
+
+    Args:
+        old (DataFrame): The older master, with the MasterColums columns.
+        new (DataFrame): The newer master.
+        tolerance (float, optional): Largest difference of a number that is not a change. Defaults to 1e-9.
+
+    Returns:
+        DataFrame: One row per added, removed or changed position with the Change, the old and
+            new quantity, value and total cost basis and their deltas, ordered by account and symbol.
+    """
+    merged = _positions(old).merge(
+        _positions(new),
+        how='outer',
+        on=KEY_COLUMNS,
+        suffixes=(' Old', ' New'),
+        indicator=True
+    )
+
+    diff = merged[KEY_COLUMNS].copy()
+    diff[CHANGE_COLUMN] = np.select(
+        [merged['_merge'] == 'right_only', merged['_merge'] == 'left_only'],
+        [ADDED, REMOVED],
+        CHANGED
+    )
+
+    changed = merged['_merge'] != 'both'
+    for column in DELTA_COLUMNS:
+        old_values = merged[column + ' Old'].fillna(0)
+        new_values = merged[column + ' New'].fillna(0)
+        diff[column + ' Old'] = merged[column + ' Old']
+        diff[column + ' New'] = merged[column + ' New']
+        diff[column + ' Change'] = new_values - old_values
+        changed |= (new_values - old_values).abs() > tolerance
+
+    return diff.loc[changed].sort_values(KEY_COLUMNS, kind='stable').reset_index(drop=True)
+
+
+def read_master(path: str) -> DataFrame:
+    """Read a summary master file in any of the output formats.
+
+    Args:
+        path (str): Path of the master.
+
+    Returns:
+        DataFrame: The master with the key columns as text and the compared columns as numbers.
+    """
+    master = read_frame(path)
+    master[KEY_COLUMNS] = master[KEY_COLUMNS].astype(object)
+    for column in DELTA_COLUMNS:
+        master[column] = pd.to_numeric(master[column], errors='coerce')
+    return master
+
+
+def read_snapshot(store: str, day: date) -> DataFrame:
+    """Read the master of one day from a snapshot store.
+
+    Args:
+        store (str): Folder of the store.
+        day (date): Date of the snapshot.
+
+    Returns:
+        DataFrame: The master of that day.
+
+    Raises:
+        ValueError: The store has no snapshot of that day.
+    """
+    # Imported here, the store needs pyarrow
+    from Snapshot_Store import load_history
+
+    master = load_history(store, columns=KEY_COLUMNS + DELTA_COLUMNS, start=day, end=day)
+    if master.shape[0] == 0:
+        raise ValueError(f'No snapshot of {day.isoformat()} in {store}')
+    return master
+
+
+def _positions(master: DataFrame) -> DataFrame:
+    # Masters built in memory have categorical keys, grouping them would add a row for every
+    # account and symbol pair of the categories. Missing symbols are kept as their own key
+    # instead of being dropped by the groupby
+    keys = master[KEY_COLUMNS].astype(object)
+    return master[DELTA_COLUMNS].groupby(
+        [keys[column] for column in KEY_COLUMNS], sort=False, dropna=False
+    ).sum().reset_index()
+
+
+def _parse_date(text: str) -> date:
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+if (__name__ == "__main__"):
+    arg_parser = ArgumentParser(description='Print the positions that changed between two summary masters.')
+    arg_parser.add_argument('old', help='older master file, or date YYYY-MM-DD of a snapshot with --store')
+    arg_parser.add_argument('new', help='newer master file, or date YYYY-MM-DD of a snapshot with --store')
+    arg_parser.add_argument('--store', help='compare two snapshots of this snapshot store')
+    arg_parser.add_argument('--output', metavar='STEM', help='also write the changes to STEM.<format>')
+    arg_parser.add_argument(
+        '--format',
+        choices=list(FORMATS),
+        default='csv',
+        help='format of the --output file (default: csv)'
+    )
+    args = arg_parser.parse_args()
+
+    if args.store is not None:
+        masters = [read_snapshot(args.store, _parse_date(day)) for day in (args.old, args.new)]
+    else:
+        masters = [read_master(path) for path in (args.old, args.new)]
+
+    changes: DataFrame = diff_masters(masters[0], masters[1])
+
+    pd.set_option('display.width', None)
+    print(changes.to_string(index=False))
+    print(', '.join(
+        f'{(changes[CHANGE_COLUMN] == change).sum()} {change}' for change in (ADDED, REMOVED, CHANGED)
+    ))
+
+    if args.output is not None:
+        write_frame(changes, args.output, args.format)
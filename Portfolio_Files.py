@@ -0,0 +1,71 @@
+import os
+from os import listdir
+from os.path import isfile, join
+from typing import Dict, List, Optional
+
+# Only the standard library is imported here, so the input files can be found without loading pandas
+
+pathFidelity: str = 'Fidelity/'
+pathEtrade: str = 'Etrade/'
+pathSprott: str = 'sprott/'
+pathAmeritrade: str = 'Ameritrade/'
+pathCanaccord: str = 'Canaccord/'
+pathSchwab: str = 'Schwab/'
+
+# First bytes of the Excel file formats
+XLSX_MAGIC: bytes = b'PK\x03\x04'
+XLS_MAGIC: bytes = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Default folders of the brokers, relative to the current directory
+DEFAULT_PATHS: Dict[str, str] = {
+    'fidelity': pathFidelity,
+    'etrade': pathEtrade,
+    # 'sprott': pathSprott,
+    # 'ameritrade': pathAmeritrade,
+    'canaccord': pathCanaccord,
+    'schwab': pathSchwab
+}
+
+
+def portfolio_paths(root: Optional[str] = None) -> Dict[str, str]:
+    """Get the broker folders of a portfolio.
+
+    Args:
+        root (Optional[str], optional): Folder of the portfolio. Defaults to None (the current directory).
+
+    Returns:
+        Dict[str, str]: Folder of every broker.
+    """
+    if root is None:
+        return dict(DEFAULT_PATHS)
+    return {broker: join(root, path) for broker, path in DEFAULT_PATHS.items()}
+
+
+def list_files(path: str) -> List[str]:
+    """List the files in a broker folder.
+
+    Args:
+        path (str): Path of the broker folder.
+
+    Returns:
+        List[str]: Paths of the files in the folder.
+    """
+    return [join(path, f) for f in listdir(path) if isfile(join(path, f))]
+
+
+def is_excel(file: str) -> bool:
+    """Tell if a file is an Excel workbook from its first bytes, or its extension if it can't be read.
+
+    Args:
+        file (str): File path.
+
+    Returns:
+        bool: True for .xlsx/.xlsm (zip) and .xls (OLE2) workbooks.
+    """
+    try:
+        with open(file, 'rb') as fr:
+            magic: bytes = fr.read(len(XLS_MAGIC))
+    except OSError:
+        return os.path.splitext(file)[1].lower() in ('.xlsx', '.xlsm', '.xls')
+
+    return magic.startswith(XLSX_MAGIC) or magic == XLS_MAGIC
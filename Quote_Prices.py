@@ -0,0 +1,112 @@
+from argparse import ArgumentParser
+from datetime import date
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+import Concise_Maker
+from Frame_IO import FORMATS, read_frame, write_frame
+from Summary_Maker import MasterColums, export_master
+from Symbol_Index import INDEX_FILE, OPTION, SymbolIndex
+
+# Shares held by one option contract, option quotes are per share
+OPTION_MULTIPLIER: int = 100
+
+
+def read_quotes(path: str) -> pd.Series:
+    """Read a quotes file, such as an end of day dump of prices.
+
+    The file is a CSV or Parquet file with the symbols in its first column and their prices in
+    its second one; the other columns are ignored. A symbol quoted twice gets its last price.
+
+    Args:
+        path (str): Path of the quotes file.
+
+    Returns:
+        pd.Series: The prices, indexed by symbol.
+    """
+    if os.path.splitext(path)[1].lower() == '.csv':
+        quotes = pd.read_csv(path, usecols=[0, 1], dtype=str)
+    else:
+        quotes = read_frame(path).iloc[:, 0:2]
+
+    prices = pd.Series(
+        pd.to_numeric(quotes.iloc[:, 1], errors='coerce').to_numpy(),
+        index=quotes.iloc[:, 0].astype(str).str.strip().to_numpy()
+    ).dropna()
+
+    return prices[~prices.index.duplicated(keep='last')]
+
+
+def reprice(master: DataFrame, quotes: pd.Series, symbol_index: Optional[SymbolIndex] = None) -> DataFrame:
+    """Mark the positions of a master to the prices of a quotes table.
+
+    The quotes are joined onto the master by symbol in one pass. The rows of quoted symbols get
+    the new Last Price and Current Value, and their Total Gain/Loss Dollar and Percent are
+    computed again from the Total Cost Basis when it is known. The other rows are unchanged.
+
+    Args:
+        master (DataFrame): The master, with the MasterColums columns.
+        quotes (pd.Series): Prices indexed by symbol, as read by read_quotes.
+        symbol_index (Optional[SymbolIndex], optional): Index that tells which symbols are options,
+            whose prices are per share of a contract of 100. Defaults to None (an index in memory).
+
+    Returns:
+        DataFrame: The repriced master.
+    """
+    symbols = master[MasterColums.SYMBOL.value].astype(object)
+    prices = symbols.map(quotes).astype(float)
+    quoted = prices.notna().to_numpy()
+
+    if symbol_index is None:
+        symbol_index = SymbolIndex()
+    symbol_index.learn(
+        symbols[quoted],
+        master[MasterColums.DESCRIPTION.value][quoted],
+        master[MasterColums.ACCOUNT_NAME.value][quoted]
+    )
+    multiplier = np.where(symbol_index.types(pd.Index(symbols)).to_numpy() == OPTION, OPTION_MULTIPLIER, 1)
+
+    master = master.copy()
+    quantity = pd.to_numeric(master[MasterColums.QUANTITY.value], errors='coerce')
+    cost_basis = pd.to_numeric(master[MasterColums.TOTAL_COST_BASIS.value], errors='coerce')
+    value = quantity * prices * multiplier
+    gain = value - cost_basis
+    percent = gain / cost_basis.where(cost_basis != 0) * 100
+
+    master.loc[quoted, MasterColums.LAST_PRICE.value] = prices.to_numpy()[quoted]
+    master.loc[quoted, MasterColums.CURRENT_VALUE.value] = value.to_numpy()[quoted]
+    master.loc[quoted, MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value] = gain.to_numpy()[quoted]
+    master.loc[quoted, MasterColums.TOTAL_GAIN_LOSS_PERCENT.value] = percent.to_numpy()[quoted]
+
+    return master
+
+
+if (__name__ == "__main__"):
+    arg_parser = ArgumentParser(description='Reprice the newest summary master from a quotes file.')
+    arg_parser.add_argument('quotes', help='CSV or Parquet file of symbols and their prices')
+    arg_parser.add_argument('--master', help='master file to reprice (default: the newest Summary_Master_<date>)')
+    arg_parser.add_argument('--concise', action='store_true', help='also create the concise summary')
+    arg_parser.add_argument(
+        '--format',
+        choices=list(FORMATS),
+        default='csv',
+        help='format of the master and concise files (default: csv)'
+    )
+    args = arg_parser.parse_args()
+
+    symbol_index = SymbolIndex(INDEX_FILE)
+    master: DataFrame = reprice(
+        Concise_Maker.read_master(args.master if args.master is not None else Concise_Maker.find_master('.')),
+        read_quotes(args.quotes),
+        symbol_index
+    )
+
+    today = date.today().strftime("%b-%d-%Y")
+    export_master(master, "Summary_Master_" + today, args.format)
+    if args.concise:
+        write_frame(Concise_Maker.build_concise(master, symbol_index), "Concise_" + today, args.format)
+    symbol_index.save()
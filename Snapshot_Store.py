@@ -0,0 +1,150 @@
+from argparse import ArgumentParser
+from datetime import date, datetime
+import os
+from os.path import join
+from typing import List, Optional
+
+import pandas as pd
+from pandas import DataFrame
+
+from Summary_Maker import MasterColums, NUMBER_COLUMNS
+
+# Name of the partition column of the store
+DATE_COLUMN: str = 'Date'
+
+# Rows per row group, small enough that a symbol filter can skip most of a snapshot
+ROW_GROUP_SIZE: int = 10000
+
+
+def append_snapshot(master: DataFrame, store: str, day: Optional[date] = None) -> str:
+    """Add a master to the snapshot store, replacing the snapshot of the same day.
+
+    Every snapshot is a Parquet file in a Date=<YYYY-MM-DD> folder with the MasterColums
+    schema, sorted by symbol so filters on a symbol can skip row groups.
+
+    Args:
+        master (DataFrame): The master.
+        store (str): Folder of the store.
+        day (Optional[date], optional): Date of the snapshot. Defaults to today.
+
+    Returns:
+        str: Path of the snapshot file.
+    """
+    pa, pq, _ = _import_pyarrow()
+
+    if day is None:
+        day = date.today()
+
+    folder = join(store, f'{DATE_COLUMN}={day.isoformat()}')
+    os.makedirs(folder, exist_ok=True)
+    path = join(folder, 'master.parquet')
+
+    master = master.sort_values(
+        [MasterColums.SYMBOL.value, MasterColums.ACCOUNT_NAME.value], kind='stable')
+    table = pa.Table.from_pandas(master, schema=_schema(pa), preserve_index=False)
+    pq.write_table(table, path + '.tmp', row_group_size=ROW_GROUP_SIZE)
+    os.replace(path + '.tmp', path)
+
+    return path
+
+
+def load_history(
+        store: str,
+        symbol: Optional[str] = None,
+        account: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> DataFrame:
+    """Read the history of positions from the snapshot store.
+
+    The filters are pushed down to the Parquet reader, so only the snapshots in the date range
+    and the row groups that can hold the symbol or account are read, and only the requested
+    columns are decoded.
+
+    Args:
+        store (str): Folder of the store.
+        symbol (Optional[str], optional): Only the rows of this symbol. Defaults to None (all).
+        account (Optional[str], optional): Only the rows of this account. Defaults to None (all).
+        columns (Optional[List[str]], optional): Master columns to read. Defaults to None (all).
+        start (Optional[date], optional): First date to read. Defaults to None (first snapshot).
+        end (Optional[date], optional): Last date to read. Defaults to None (last snapshot).
+
+    Returns:
+        DataFrame: The matching rows with a Date column, ordered by date.
+    """
+    pa, _, ds = _import_pyarrow()
+
+    dataset = ds.dataset(
+        store,
+        schema=_schema(pa).append(pa.field(DATE_COLUMN, pa.date32())),
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([(DATE_COLUMN, pa.date32())]), flavor='hive')
+    )
+
+    conditions = []
+    if symbol is not None:
+        conditions.append(ds.field(MasterColums.SYMBOL.value) == symbol)
+    if account is not None:
+        conditions.append(ds.field(MasterColums.ACCOUNT_NAME.value) == account)
+    if start is not None:
+        conditions.append(ds.field(DATE_COLUMN) >= start)
+    if end is not None:
+        conditions.append(ds.field(DATE_COLUMN) <= end)
+
+    condition = None
+    for part in conditions:
+        condition = part if condition is None else condition & part
+
+    if columns is None:
+        columns = [column.value for column in MasterColums]
+
+    history: DataFrame = dataset.to_table(
+        columns=[DATE_COLUMN] + [column for column in columns if column != DATE_COLUMN],
+        filter=condition
+    ).to_pandas()
+
+    return history.sort_values(DATE_COLUMN, kind='stable').reset_index(drop=True)
+
+
+def _schema(pa):
+    return pa.schema([
+        (column.value, pa.float64() if column.value in NUMBER_COLUMNS else pa.string())
+        for column in MasterColums
+    ])
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError('The snapshot store needs pyarrow, install it with "pip install pyarrow"') from e
+
+    return pyarrow, pyarrow.parquet, pyarrow.dataset
+
+
+def _parse_date(text: str) -> date:
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
+if (__name__ == "__main__"):
+    arg_parser = ArgumentParser(description='Print the history of positions from a snapshot store.')
+    arg_parser.add_argument('store', help='folder of the snapshot store')
+    arg_parser.add_argument('--symbol', help='only the rows of this symbol')
+    arg_parser.add_argument('--account', help='only the rows of this account')
+    arg_parser.add_argument('--columns', nargs='+', help='master columns to show (default: all)')
+    arg_parser.add_argument('--start', type=_parse_date, help='first date, YYYY-MM-DD')
+    arg_parser.add_argument('--end', type=_parse_date, help='last date, YYYY-MM-DD')
+    args = arg_parser.parse_args()
+
+    pd.set_option('display.width', None)
+    print(load_history(
+        args.store,
+        symbol=args.symbol,
+        account=args.account,
+        columns=args.columns,
+        start=args.start,
+        end=args.end
+    ).to_string(index=False))
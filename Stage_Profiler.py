@@ -0,0 +1,138 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple
+
+
+class StageRecord(NamedTuple):
+    """Measurements of one run of a stage."""
+    stage: str
+    # Input file or other detail of the run, empty for whole stages
+    name: str
+    seconds: float
+    rows: int
+    # Peak memory allocated during the stage, above the memory in use when it started
+    peak_bytes: int
+    parser: str = ''
+
+
+class StageCounter:
+    """Handed to the body of a stage to report the number of rows it processed."""
+
+    def __init__(self):
+        self.rows: int = 0
+
+
+class Profiler:
+    """Records the wall time, rows and peak memory of the stages of a run.
+
+    Stages can be nested; the peak memory of a stage includes the stages inside it. The memory
+    is measured with tracemalloc, which slows the run down, so the times are best compared
+    with each other rather than with runs that aren't profiled.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Args:
+            enabled (bool, optional): Record the stages. A disabled profiler only runs the
+                stage bodies. Defaults to True.
+        """
+        self.enabled: bool = enabled
+        self.records: List[StageRecord] = []
+        # Highest peak seen by every open stage, innermost last
+        self._peaks: List[int] = []
+
+    @contextmanager
+    def stage(self, stage: str, name: str = '', parser: str = '') -> Iterator[StageCounter]:
+        """Measure the body of a with statement as a stage.
+
+        Args:
+            stage (str): Name of the stage.
+            name (str, optional): Input file or other detail of the run. Defaults to ''.
+            parser (str, optional): Name of the parser of the file. Defaults to ''.
+
+        Yields:
+            StageCounter: Set its rows to the number of rows the stage processed.
+        """
+        counter = StageCounter()
+        if not self.enabled:
+            yield counter
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        # Python 3.9 and later, before that the peak of a stage can include the stages before it
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._peaks.append(current)
+
+        start = time.perf_counter()
+        try:
+            yield counter
+        finally:
+            seconds = time.perf_counter() - start
+            stage_peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], stage_peak)
+            if started_tracing:
+                tracemalloc.stop()
+
+            self.records.append(StageRecord(stage, name, seconds, counter.rows, stage_peak - current, parser))
+
+    def extend(self, records: List[StageRecord]):
+        """Add records measured elsewhere, such as in a worker process.
+
+        Args:
+            records (List[StageRecord]): The records.
+        """
+        if self.enabled:
+            self.records.extend(records)
+
+    def report(self) -> dict:
+        """Get the records and their totals per stage and per parser.
+
+        Returns:
+            dict: The report, ready to be written as JSON.
+        """
+        return {
+            'stages': _totals(self.records, lambda record: record.stage),
+            'parsers': _totals([record for record in self.records if record.parser], lambda record: record.parser),
+            'records': [record._asdict() for record in self.records]
+        }
+
+    def write_json(self, path: str):
+        """Write the report as JSON.
+
+        Args:
+            path (str): Path of the JSON file.
+        """
+        with open(path, 'w', encoding='utf-8') as fw:
+            json.dump(self.report(), fw, indent=2)
+
+    def print_table(self):
+        """Print the totals per stage and per parser as a table."""
+        report = self.report()
+        print(f'{"stage":<28}{"runs":>6}{"seconds":>10}{"rows":>10}{"peak MB":>10}')
+        for group in ['stages', 'parsers']:
+            for name, total in report[group].items():
+                print(
+                    f'{name:<28}{total["runs"]:>6}{total["seconds"]:>10.4f}'
+                    f'{total["rows"]:>10}{total["peak_bytes"] / 1e6:>10.2f}'
+                )
+
+
+def _totals(records: List[StageRecord], key) -> Dict[str, dict]:
+    totals: Dict[str, dict] = {}
+    for record in records:
+        total = totals.setdefault(key(record), {'runs': 0, 'seconds': 0.0, 'rows': 0, 'peak_bytes': 0})
+        total['runs'] += 1
+        total['seconds'] += record.seconds
+        total['rows'] += record.rows
+        total['peak_bytes'] = max(total['peak_bytes'], record.peak_bytes)
+    return totals
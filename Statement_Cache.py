@@ -0,0 +1,257 @@
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from os.path import getsize, isfile, join
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+from pandas import DataFrame
+
+INDEX_FILE: str = 'index.json'
+# Entries stored since the index was last written, one JSON line per entry
+JOURNAL_FILE: str = 'index.journal'
+
+# Extensions of the stored frames
+FEATHER_EXTENSION: str = '.feather'
+PICKLE_EXTENSION: str = '.pkl'
+
+
+class StatementCache:
+    """On-disk cache of the parsed frames of statement files.
+
+    An entry is keyed by the file path, size, mtime and a hash of the file contents, so
+    only new or changed files have to be parsed again. Entries are evicted least recently
+    used first once the cache grows past its size limit.
+
+    Every stored entry is appended to a journal right away, so the entries of a run that
+    stops before the index is saved are still found by the next run. Saving writes the index
+    once, evicts and clears the journal.
+
+    Frames are stored as Feather files when pyarrow is installed: the parsed frames hold float
+    numbers and text, which Feather keeps exactly, and loading them can't run code the way
+    unpickling a file written by someone else can. Without pyarrow, and for frames of custom
+    parsers that Feather can't hold, such as object columns that mix numbers and text, the
+    frames are stored as pickles.
+    """
+
+    def __init__(
+            self,
+            directory: str = '.summary_cache',
+            max_bytes: int = 256 * 1024 * 1024,
+            version: str = ''
+        ):
+        """
+        Args:
+            directory (str, optional): Folder the cache is stored in. Defaults to '.summary_cache'.
+            max_bytes (int, optional): Size limit of the stored frames. Defaults to 256 MB.
+            version (str, optional): Version of the parsers. Entries made by another version are
+                never used. Defaults to ''.
+        """
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.version: str = version
+        self.hits: int = 0
+        self.misses: int = 0
+        self._index: Dict[str, dict] = {}
+
+        index_path = join(directory, INDEX_FILE)
+        if isfile(index_path):
+            try:
+                with open(index_path, encoding='utf-8') as fr:
+                    self._index = json.load(fr)
+            except (OSError, ValueError):
+                self._index = {}
+
+        journal_path = join(directory, JOURNAL_FILE)
+        if isfile(journal_path):
+            with open(journal_path, encoding='utf-8') as fr:
+                for line in fr:
+                    try:
+                        f, entry = json.loads(line)
+                    except ValueError:
+                        # The last line of a run that stopped while writing it
+                        continue
+                    self._index[f] = entry
+
+    def get(self, f: str) -> Optional[DataFrame]:
+        """Get the cached frame of a file.
+
+        Args:
+            f (str): Path of the statement file.
+
+        Returns:
+            Optional[DataFrame]: The cached frame or None if the file has to be parsed.
+        """
+        entry = self._index.get(f)
+        stat = os.stat(f)
+
+        if (entry is not None and entry['version'] == self.version and
+                (entry['size'], entry['mtime']) != (stat.st_size, stat.st_mtime_ns)):
+            # The file was touched, only reuse the entry if the contents are the same
+            if entry['hash'] == file_hash(f):
+                entry['size'] = stat.st_size
+                entry['mtime'] = stat.st_mtime_ns
+            else:
+                entry = None
+
+        if entry is None or entry['version'] != self.version:
+            self.misses += 1
+            return None
+
+        try:
+            path = join(self.directory, entry['file'])
+            frame: DataFrame = pd.read_feather(path) if path.endswith(FEATHER_EXTENSION) else pd.read_pickle(path)
+        except Exception:
+            self.misses += 1
+            return None
+
+        entry['last_used'] = time.time()
+        self.hits += 1
+        return frame
+
+    def put(self, f: str, frame: DataFrame):
+        """Store the parsed frame of a file and append its entry to the journal.
+
+        Args:
+            f (str): Path of the statement file.
+            frame (DataFrame): The parsed frame.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        stat = os.stat(f)
+        content_hash = file_hash(f)
+        key = hashlib.sha256(
+            '\0'.join([f, content_hash, self.version]).encode('utf-8')).hexdigest()
+        old_entry = self._index.get(f)
+        name = self._write(key, frame)
+        if old_entry is not None and old_entry['file'] != name:
+            self._remove_file(old_entry['file'])
+
+        self._index[f] = {
+            'file': name,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'hash': content_hash,
+            'version': self.version,
+            'bytes': getsize(join(self.directory, name)),
+            'last_used': time.time()
+        }
+        with open(join(self.directory, JOURNAL_FILE), 'a', encoding='utf-8') as fw:
+            fw.write(json.dumps([f, self._index[f]]) + '\n')
+
+    def save(self):
+        """Evict the least recently used entries that don't fit in the cache, write the index and clear the journal."""
+        if not self._index and not os.path.isdir(self.directory):
+            return
+
+        total: int = sum(entry['bytes'] for entry in self._index.values())
+        for f, entry in sorted(self._index.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            self._remove_file(entry['file'])
+            del self._index[f]
+            total -= entry['bytes']
+
+        os.makedirs(self.directory, exist_ok=True)
+        index_path = join(self.directory, INDEX_FILE)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as fw:
+            json.dump(self._index, fw)
+        os.replace(index_path + '.tmp', index_path)
+        self._remove_file(JOURNAL_FILE)
+
+    def _write(self, key: str, frame: DataFrame) -> str:
+        """Write a frame as Feather if pyarrow is installed and can hold it, else as a pickle. Returns the file name."""
+        if _has_pyarrow():
+            name = key + FEATHER_EXTENSION
+            try:
+                # Feather only stores the default index, the index of a parsed frame is not used
+                frame.reset_index(drop=True).to_feather(join(self.directory, name))
+                return name
+            except Exception:
+                self._remove_file(name)
+
+        name = key + PICKLE_EXTENSION
+        frame.to_pickle(join(self.directory, name))
+        return name
+
+    def _remove_file(self, name: str):
+        try:
+            os.remove(join(self.directory, name))
+        except OSError:
+            pass
+
+
+def _has_pyarrow() -> bool:
+    # Only looked up, pyarrow is imported by pandas when a frame is written
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def file_hash(f: str) -> str:
+    """Hash the contents of a file.
+
+    Args:
+        f (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the contents.
+    """
+    digest = hashlib.sha256()
+    with open(f, 'rb') as fr:
+        for block in iter(lambda: fr.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MemoryStatementCache:
+    """In-memory cache of the parsed frames of statement files, for long-running processes.
+
+    Has the same interface as StatementCache. An entry is reused while the size and mtime of
+    its file stay the same.
+    """
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: Dict[str, Tuple[int, int, DataFrame]] = {}
+
+    def get(self, f: str) -> Optional[DataFrame]:
+        """Get the cached frame of a file.
+
+        Args:
+            f (str): Path of the statement file.
+
+        Returns:
+            Optional[DataFrame]: The cached frame or None if the file has to be parsed.
+        """
+        entry = self._entries.get(f)
+        stat = os.stat(f)
+
+        if entry is None or (entry[0], entry[1]) != (stat.st_size, stat.st_mtime_ns):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[2]
+
+    def put(self, f: str, frame: DataFrame):
+        """Store the parsed frame of a file.
+
+        Args:
+            f (str): Path of the statement file.
+            frame (DataFrame): The parsed frame.
+        """
+        stat = os.stat(f)
+        self._entries[f] = (stat.st_size, stat.st_mtime_ns, frame)
+
+    def discard(self, f: str):
+        """Forget the frame of a file that was removed.
+
+        Args:
+            f (str): Path of the statement file.
+        """
+        self._entries.pop(f, None)
+
+    def save(self):
+        """Nothing to write, the entries only live in memory."""
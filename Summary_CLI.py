@@ -0,0 +1,84 @@
+"""Single entry point of the summary tools.
+
+Only the standard library is imported up front. numpy and pandas are loaded by the commands
+that need them, and pandas loads the Excel engines only when a workbook is read.
+"""
+from argparse import ArgumentParser
+import runpy
+import sys
+from os.path import getsize, isdir
+from typing import Dict, List, Optional, Tuple
+
+from Portfolio_Files import is_excel, list_files, portfolio_paths
+
+__version__: str = '1.0.0'
+
+# Module run by every command, with its description
+COMMANDS: Dict[str, Tuple[str, str]] = {
+    'master': ('Summary_Maker', 'create the summary master from the broker folders'),
+    'concise': ('Concise_Maker', 'create the concise summary from the newest summary master'),
+    'batch': ('Batch_Summaries', 'create the summaries of many portfolios'),
+    'history': ('Snapshot_Store', 'print the history of positions from a snapshot store'),
+    'diff': ('Master_Diff', 'print the positions that changed between two masters or snapshots'),
+    'reprice': ('Quote_Prices', 'reprice the newest summary master from a quotes file'),
+    'benchmark': ('Benchmark', 'benchmark the parsers on synthetic broker exports')
+}
+
+# Budget of the cumulative import time of this module, as reported by python -X importtime
+IMPORT_BUDGET_US: int = 30000
+
+
+def list_inputs(root: Optional[str] = None):
+    """Print the input files found in the broker folders of a portfolio.
+
+    Args:
+        root (Optional[str], optional): Folder of the portfolio. Defaults to None (the current directory).
+    """
+    for broker, path in portfolio_paths(root).items():
+        if not isdir(path):
+            print(f'{broker}: no {path} folder')
+            continue
+
+        files: List[str] = sorted(list_files(path))
+        print(f'{broker}: {len(files)} files in {path}')
+        for f in files:
+            print(f'  {f} ({"workbook" if is_excel(f) else "csv"}, {getsize(f) / 1e3:.1f} kB)')
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run a command.
+
+    Args:
+        argv (Optional[List[str]], optional): Arguments of the command line. Defaults to sys.argv[1:].
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    # The commands parse their own options, as if their script was run
+    if len(argv) > 0 and argv[0] in COMMANDS:
+        module, _ = COMMANDS[argv[0]]
+        sys.argv = [module + '.py'] + argv[1:]
+        runpy.run_module(module, run_name='__main__', alter_sys=True)
+        return
+
+    arg_parser = ArgumentParser(
+        prog='Summary_CLI.py',
+        description='Create summaries of broker statements.',
+        epilog='Run "Summary_CLI.py COMMAND --help" for the options of a command.'
+    )
+    arg_parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    commands = arg_parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+
+    list_parser = commands.add_parser('list', help='list the input files of the broker folders')
+    list_parser.add_argument('root', nargs='?', help='folder of the portfolio (default: current directory)')
+
+    # Only listed for the help, they are run above
+    for command, (_, description) in COMMANDS.items():
+        commands.add_parser(command, help=description)
+
+    args = arg_parser.parse_args(argv)
+    list_inputs(args.root)
+
+
+if (__name__ == "__main__"):
+    main()
@@ -1,21 +1,39 @@
+from argparse import ArgumentParser
+from collections import deque
 from enum import Enum
+from functools import partial
+import json
 import os
+import pickle
+import sys
 import traceback
-from typing import List, Optional, Sequence, Tuple, Union
+import warnings
+from typing import Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Pattern, Sequence, Tuple, Union
 import numpy as np
 import pandas as pd
 from pandas import DataFrame
+import csv
 import io
-from os import listdir
-from os.path import isfile, join
+import mmap
+import re
+from os.path import isdir, join
 from datetime import date
+from Statement_Cache import StatementCache, file_hash
+import Concise_Maker
+from Frame_IO import FORMATS, write_frame
+from Stage_Profiler import Profiler, StageRecord
+from Symbol_Index import INDEX_FILE, SymbolIndex
+from Portfolio_Files import (
+    DEFAULT_PATHS, is_excel, list_files, portfolio_paths,
+    pathAmeritrade, pathCanaccord, pathEtrade, pathFidelity, pathSchwab, pathSprott
+)
 
-pathFidelity: str = 'Fidelity/'
-pathEtrade: str = 'Etrade/'
-pathSprott: str = 'sprott/'
-pathAmeritrade: str = 'Ameritrade/'
-pathCanaccord: str = 'Canaccord/'
-pathSchwab: str = 'Schwab/'
+# Readers of the tables of CSV statements: the pandas C parser, or the multithreaded pyarrow CSV reader
+ENGINES: Tuple[str, ...] = ('c', 'arrow')
+
+# Currency formatting of numbers
+BAD_CHARACTERS: Pattern = re.compile('[%\\+\\(\\)$,\\s]')
+NEGATIVE_NUMBER: Pattern = re.compile('^\\s*\\(.*\\)\\s*$')
 
 
 class MasterColums(Enum):
@@ -31,40 +49,313 @@ class MasterColums(Enum):
     TOTAL_COST_BASIS: str = 'Total Cost Basis'
 
 
-def main():
-
-    # Create master DataFrame from columns from Fidelity files
-    master: DataFrame = DataFrame(columns=[
-        MasterColums.ACCOUNT_NAME.value,
-        MasterColums.SYMBOL.value,
-        MasterColums.DESCRIPTION.value,
-        MasterColums.QUANTITY.value,
-        MasterColums.LAST_PRICE.value,
-        MasterColums.CURRENT_VALUE.value,
-        MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value,
-        MasterColums.TOTAL_GAIN_LOSS_PERCENT.value,
-        MasterColums.COST_BASIS_PER_SHARE.value,
-        MasterColums.TOTAL_COST_BASIS.value
-    ])
-
-    parsers_list = [
-        parse_fidelity,
-        parse_etrade,
-        # parse_sprott,
-        # parse_ameritrade,
-        parse_canaccord,
-        parse_schwab
-    ]
-    # Parse the files and add to master
-    for parser in parsers_list:
-        master = parser(master)
+# Columns of the master that hold numbers, the others hold text
+NUMBER_COLUMNS: List[str] = [
+    MasterColums.QUANTITY.value,
+    MasterColums.LAST_PRICE.value,
+    MasterColums.CURRENT_VALUE.value,
+    MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value,
+    MasterColums.TOTAL_GAIN_LOSS_PERCENT.value,
+    MasterColums.COST_BASIS_PER_SHARE.value,
+    MasterColums.TOTAL_COST_BASIS.value
+]
+TEXT_COLUMNS: List[str] = [
+    column.value for column in MasterColums if column.value not in NUMBER_COLUMNS
+]
+
+
+class CashRule(NamedTuple):
+    """Rows of a broker file that hold cash or a money market position.
+
+    These rows have no quantity or last price, the quantity is set to the current value and
+    the last price to 1.
+    """
+    column: MasterColums
+    # Lower case values that mark a cash row
+    values: Tuple[str, ...]
+    # Match the values anywhere in the cell instead of the whole cell
+    contains: bool
+
+
+CASH_RULES: Dict[str, CashRule] = {
+    'fidelity': CashRule(MasterColums.DESCRIPTION, ('money market', 'pending activity'), contains=True),
+    'etrade': CashRule(MasterColums.SYMBOL, ('cash',), contains=False),
+    'schwab': CashRule(MasterColums.SYMBOL, ('cash',), contains=True)
+}
+
+
+# Column of a statement table: its position, its header, or the headers it has had in
+# different versions of the export
+ColumnSource = Union[int, str, Tuple[str, ...]]
+
+# Changes a frame with the master columns in place, given the extra columns of the table
+Fixup = Callable[[DataFrame, DataFrame], None]
+
+
+class BrokerLayout(NamedTuple):
+    """Declarative description of the statement files of a broker.
+
+    A layout is compiled once into a LayoutReader. Columns that are not found in a file
+    are left empty.
+    """
+    # Table column of every master column the broker has
+    columns: Dict[MasterColums, ColumnSource]
+    # Tells if the comma separated cells of a row are the header of the table.
+    # None if the header is the row at data_start.
+    is_start: Optional[Callable[[List[str]], bool]] = None
+    # Row number of the header when there is no is_start, 0 is the first row
+    data_start: int = 0
+    # Tells if the comma separated cells of a row are the first row after the table.
+    # None if the table runs to the end of the file.
+    is_end: Optional[Callable[[List[str]], bool]] = None
+    # Rows at the end of the table that are not positions
+    footer_rows: int = 0
+    # Rows of the table with fewer cells are skipped, CSV files only
+    min_columns: int = 0
+    # Cells that are missing values, besides the pandas defaults
+    na_values: Tuple[str, ...] = ()
+    # Other table columns the fixups need, by name
+    extra_columns: Dict[str, ColumnSource] = {}
+    # Account name from the cells of the rows above the table and the file path,
+    # for tables without an account column
+    account: Optional[Callable[[List[List[str]], str], str]] = None
+    # Run on the text before the numbers are cleaned. The text columns are Arrow strings
+    # with the arrow engine, so use the .str methods rather than operators on them.
+    prepare: Tuple[Fixup, ...] = ()
+    # Run after the numbers are cleaned
+    fixups: Tuple[Fixup, ...] = ()
+    cash_rule: Optional[CashRule] = None
+
+
+class ParseFailure(NamedTuple):
+    """A statement file that could not be parsed."""
+    file: str
+    parser: str
+    # Name of the exception class
+    error: str
+    message: str
+    traceback: str
+
+
+# Report of the files a run could not parse, in the folder of the portfolio
+FAILURES_FILE: str = 'parse_failures.json'
+
+
+def main(
+        workers: int = 1,
+        cache: Optional[StatementCache] = None,
+        write_master: bool = True,
+        concise: bool = False,
+        snapshot_store: Optional[str] = None,
+        output_format: str = 'csv',
+        profile: bool = False,
+        root: Optional[str] = None,
+        quotes: Optional[str] = None,
+        engine: str = 'c',
+        failures: Optional[List[ParseFailure]] = None
+    ) -> DataFrame:
+    """Build the summary master from the broker folders and export it.
+
+    Files that can't be parsed are left out of the master and reported in parse_failures.json.
+    With a cache, the parsed files are kept as soon as they are parsed, so the next run only
+    parses the files that failed or changed.
+
+    Args:
+        workers (int, optional): Number of processes used to parse the files. Defaults to 1.
+        cache (Optional[StatementCache], optional): Cache of parsed files. Defaults to None (no cache).
+        write_master (bool, optional): Write the master file. Defaults to True.
+        concise (bool, optional): Also build the concise summary from the master in memory
+            and write it, classifying the symbols with the symbol index of the portfolio. Defaults to False.
+        snapshot_store (Optional[str], optional): Folder of the snapshot store to add the master to.
+            Defaults to None (no snapshot).
+        output_format (str, optional): Format of the written files, one of Frame_IO.FORMATS. Defaults to 'csv'.
+        profile (bool, optional): Measure the time, rows and peak memory of every stage, parser
+            and file, print them and write them to Profile_<date>.json. Defaults to False.
+        root (Optional[str], optional): Folder of the portfolio, it holds the broker folders and gets the
+            written files. Defaults to None (the current directory).
+        quotes (Optional[str], optional): CSV or Parquet file of symbols and prices to reprice the
+            master with before it is written. Defaults to None (the prices of the broker files).
+        engine (str, optional): Reader of the CSV files, one of ENGINES. Defaults to 'c'.
+        failures (Optional[List[ParseFailure]], optional): Gets the files that could not be parsed.
+            Defaults to None.
+
+    Returns:
+        DataFrame: The master.
+    """
+    profiler = Profiler(enabled=profile)
+    today = date.today()
+    if failures is None:
+        failures = []
+
+    def output(name: str) -> str:
+        return name if root is None else join(root, name)
+
+    with profiler.stage('total') as total:
+        master: DataFrame = build_master(
+            portfolio_paths(root),
+            workers=workers,
+            cache=cache,
+            profiler=profiler,
+            engine=resolve_engine(engine),
+            failures=failures
+        )
+        write_failures(failures, output(FAILURES_FILE))
+        total.rows = master.shape[0]
+        print(f'Master: {master.shape[0]} rows, {master.memory_usage(deep=True).sum() / 1e6:.2f} MB')
+        symbol_index = SymbolIndex(output(INDEX_FILE))
+
+        if quotes is not None:
+            with profiler.stage('reprice') as counter:
+                # Imported here, the repricer imports this module
+                from Quote_Prices import read_quotes, reprice
+                master = reprice(master, read_quotes(quotes), symbol_index)
+                counter.rows = master.shape[0]
+
+        if write_master:
+            with profiler.stage('export master') as counter:
+                export_master(master, output("Summary_Master_" + today.strftime("%b-%d-%Y")), output_format)
+                counter.rows = master.shape[0]
+
+        if concise:
+            with profiler.stage('concise') as counter:
+                concise_frame: DataFrame = Concise_Maker.build_concise(master, symbol_index)
+                write_frame(concise_frame, output("Concise_" + today.strftime("%b-%d-%Y")), output_format)
+                counter.rows = concise_frame.shape[0]
+
+        if snapshot_store is not None:
+            with profiler.stage('snapshot') as counter:
+                # Imported here, the store needs pyarrow and imports this module
+                from Snapshot_Store import append_snapshot
+                append_snapshot(master, snapshot_store, today)
+                counter.rows = master.shape[0]
+
+        symbol_index.save()
+
+    if profile:
+        profiler.print_table()
+        profiler.write_json(output("Profile_" + today.strftime("%b-%d-%Y") + ".json"))
+
+    return master
+
+
+def main_streaming(chunksize: int = 100000, output_format: str = 'csv'):
+    """Build only the concise summary from the broker folders, reading the files in chunks.
+
+    The master is never built, so the memory used depends on the chunk size and the number
+    of symbols instead of the number of rows in the files.
+
+    Args:
+        chunksize (int, optional): Number of table rows per chunk. Defaults to 100000.
+        output_format (str, optional): Format of the concise file, one of Frame_IO.FORMATS. Defaults to 'csv'.
+    """
+    symbol_index = SymbolIndex(INDEX_FILE)
+    concise: DataFrame = Concise_Maker.build_concise_chunked(iter_master_chunks(chunksize=chunksize), symbol_index)
+    symbol_index.save()
+    print(f'Concise: {concise.shape[0]} symbols')
+    write_frame(concise, "Concise_" + date.today().strftime("%b-%d-%Y"), output_format)
+
+
+def build_master(
+        paths: Optional[Dict[str, str]] = None,
+        workers: int = 1,
+        cache: Optional[StatementCache] = None,
+        profiler: Optional[Profiler] = None,
+        engine: str = 'c',
+        failures: Optional[List[ParseFailure]] = None
+    ) -> DataFrame:
+    """Build the summary master from the broker folders.
+
+    Args:
+        paths (Optional[Dict[str, str]], optional): Folder of every broker to parse, by the names in
+            FILE_PARSERS. Folders that don't exist are skipped. Defaults to the folders in the current directory.
+        workers (int, optional): Number of processes used to parse the files. Defaults to 1.
+        cache (Optional[StatementCache], optional): Cache of parsed files. Defaults to None (no cache).
+        profiler (Optional[Profiler], optional): Records the stages. Defaults to None (not profiled).
+        engine (str, optional): Reader of the CSV files of the brokers with a layout, one of ENGINES.
+            The master is the same with every engine. Defaults to 'c'.
+        failures (Optional[List[ParseFailure]], optional): Gets the files that could not be parsed, which
+            are left out of the master. Defaults to None (raise a ValueError once the other files are parsed).
+
+    Returns:
+        DataFrame: The master with the MasterColums columns.
+    """
+    if paths is None:
+        paths = DEFAULT_PATHS
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+
+    # Parse the files and collect the per-file frames
+    with profiler.stage('parse') as counter:
+        frames: List[DataFrame] = parse_files(
+            [
+                (_file_parser(broker, engine), f)
+                for broker, path in paths.items() if isdir(path)
+                for f in list_files(path)
+            ],
+            workers=workers,
+            cache=cache,
+            profiler=profiler,
+            failures=failures
+        )
+        counter.rows = sum(frame.shape[0] for frame in frames)
 
     # Get rid of rows with no quantity
-    master[MasterColums.QUANTITY.value].replace('', np.nan, inplace=True)
-    master.dropna(subset=[MasterColums.QUANTITY.value], inplace=True)
+    with profiler.stage('drop empty quantity') as counter:
+        frames = [drop_empty_quantity(frame) for frame in frames]
+        counter.rows = sum(frame.shape[0] for frame in frames)
 
     # Add names of banks at the end
-    banks = DataFrame(data={
+    frames.append(bank_positions())
+
+    # Build the master once from all of the parsed files
+    with profiler.stage('concat master') as counter:
+        master: DataFrame = concat_master(frames)
+        counter.rows = master.shape[0]
+
+    return master
+
+
+def _file_parser(broker: str, engine: str) -> Callable[[str], DataFrame]:
+    parser = FILE_PARSERS[broker]
+    if engine != 'c' and isinstance(parser, BrokerParser):
+        return BrokerParser(broker, engine, parser.layout)
+    return parser
+
+
+def iter_master_chunks(paths: Optional[Dict[str, str]] = None, chunksize: int = 100000) -> Iterator[DataFrame]:
+    """Parse the broker folders into chunks of master rows without building the whole master.
+
+    The chunks hold the same rows in the same order as the master of build_master, only
+    one chunk of one file is in memory at a time.
+
+    Args:
+        paths (Optional[Dict[str, str]], optional): Folder of every broker to parse, by the names in
+            FILE_PARSERS. Folders that don't exist are skipped. Defaults to the folders in the current directory.
+        chunksize (int, optional): Number of table rows per chunk. Defaults to 100000.
+
+    Yields:
+        DataFrame: Chunks with the master columns and dtypes.
+    """
+    if paths is None:
+        paths = DEFAULT_PATHS
+
+    for broker, path in paths.items():
+        if not isdir(path):
+            continue
+        for f in list_files(path):
+            for chunk in iter_file_chunks(broker, f, chunksize):
+                yield concat_master([drop_empty_quantity(chunk)])
+
+    yield concat_master([bank_positions()])
+
+
+def bank_positions() -> DataFrame:
+    """Get the positions held outside of the brokers, added at the end of the master.
+
+    Returns:
+        DataFrame: Frame with the master columns.
+    """
+    return DataFrame(data={
         MasterColums.ACCOUNT_NAME.value: [  # Account Name
             "QCU", "Etrade", "VioBank", 'Dealmaker', 'Dealmaker', 'Dealmaker',
             'Dealmaker', 'Robin Hood', 'Robin Hood', 'Kraken'
@@ -79,540 +370,1157 @@ def main():
         ],
         MasterColums.LAST_PRICE.value:  # Last Price
         [
-            '1', '1', '1'
-        ] + ([''] * (10-3))
+            1, 1, 1
+        ] + ([np.nan] * (10-3))
     })
-    master = master.append(banks, ignore_index=True)
 
-    # Export file as csv
-    today = date.today()
-    master.replace('[,]', '', regex=True, inplace=True)
-    master.to_csv("Summary_Master_" +
-                  today.strftime("%b-%d-%Y") + ".csv", index=False)
 
+def export_master(master: DataFrame, stem: str, output_format: str = 'csv') -> str:
+    """Write the master in one of the output formats.
 
-def parse_fidelity(master: DataFrame) -> DataFrame:
-    """Parse the fidelity files and add them to the master"""
-    # Find all of the files in the 'Fidelity' folder
-    files = [join(pathFidelity, f) for f in listdir(pathFidelity) if isfile(join(pathFidelity, f))]
-
-    use_cols: int = 15
-
-    # append all of the files to masters
-    for f in files:
-        with open(f, encoding='ascii', errors='ignore') as fr:
-            data = fr.read()
-            data_end: int = -1
-
-            # Find the row where the header ends and the data begins
-            rows: List[str] = data.split('\n')
-            for i, row in enumerate(rows):
-                columns: List[str] = row.split(',')
-                if data_end == -1 and columns[0] == '':
-                    data_end = len(rows) - i - 1
-
-        _, file = read_file(
-            data,
-            data_start=None,
-            data_end=data_end,
-            use_cols=use_cols,
-            header=0,
-            na_values=['--', 'n/a']
-        )
+    For csv, commas are removed from the text columns so every cell of the csv is unquoted.
+    The other formats are written as they are.
 
-        # drop useless columns
-        file = file.drop(
-            columns=[
-                "Last Price Change",
-                "Today's Gain/Loss Dollar", 
-                "Today's Gain/Loss Percent", 
-                "Type",
-                "Percent Of Account"
-            ],
-            errors='ignore'
-        )
+    Args:
+        master (DataFrame): The master.
+        stem (str): Path of the file without the extension.
+        output_format (str, optional): One of Frame_IO.FORMATS. Defaults to 'csv'.
+
+    Returns:
+        str: Path of the written file.
+    """
+    if output_format == 'csv':
+        master = master.copy()
+        master[TEXT_COLUMNS] = master[TEXT_COLUMNS].astype(object).replace('[,]', '', regex=True)
 
-        # Get rid of special characters
-        file.replace('[%]', '', regex=True, inplace=True)
-        remove_bad_characters(file, 4)
-        remove_bad_characters(file, 5)
-        remove_bad_characters(file, 6)
-        remove_bad_characters(file, 7)
-        remove_bad_characters(file, 8)
-        remove_bad_characters(file, 9)
-        remove_bad_characters(file, 10)
-
-        # Condense Account name and number columns into one
-        if (MasterColums.ACCOUNT_NAME.value not in file.columns):
-            file[MasterColums.ACCOUNT_NAME.value] = file[file.columns[0]] + \
-                " " + file[file.columns[1]]
-            file = file.drop(columns=['Account Number', 'Account Name'])
-
-        # Handle renamed Total Cost Basis column
-        if (MasterColums.TOTAL_COST_BASIS.value not in file.columns and 'Cost Basis Total' in file.columns):
-            file = file.rename(
-                columns={'Cost Basis Total': MasterColums.TOTAL_COST_BASIS.value})
-
-        # Handle renamed Cost Basis Per Share column
-        if (MasterColums.COST_BASIS_PER_SHARE.value not in file.columns and 'Average Cost Basis' in file.columns):
-            file = file.rename(
-                columns={'Average Cost Basis': MasterColums.COST_BASIS_PER_SHARE.value})
-
-        file[MasterColums.DESCRIPTION.value] = file[MasterColums.DESCRIPTION.value].fillna('').astype(str)
-        # Money Market and Pending Activity has no quantity, set to 1
-        for i in range(0, file.shape[0]):
-            description: str = file.loc[i, MasterColums.DESCRIPTION.value].lower()
-            
-            if ('money market' in description or 
-                'pending activity' in description):
-                file.loc[i, MasterColums.QUANTITY.value] = file.loc[i, MasterColums.CURRENT_VALUE.value]
-                file.loc[i, MasterColums.LAST_PRICE.value] = 1
-
-        # Total gain/loss dollar always positive, use percentage to check if it should be negative
-        # file['Total Gain/Loss Percent'] = pd.to_numeric(
-        #     file['Total Gain/Loss Percent'])
-        # file['Total Gain/Loss Dollar'] = [  
-        #     ('-' + str(dollar)) if percent < 0 else dollar
-        #     for dollar, percent in zip(file['Total Gain/Loss Dollar'], file['Total Gain/Loss Percent'])]
-
-        master = master.append(file, ignore_index=True)
+    return write_frame(master, stem, output_format)
 
-    return master
 
+def parse_files(
+        tasks: Sequence[Tuple[Callable[[str], DataFrame], str]],
+        workers: int = 1,
+        cache: Optional[StatementCache] = None,
+        profiler: Optional[Profiler] = None,
+        failures: Optional[List[ParseFailure]] = None
+    ) -> List[DataFrame]:
+    """Run the file parsers, optionally spread over a pool of processes.
 
-def parse_etrade(master: DataFrame) -> DataFrame:
-    """Parse the etrade files and add them to the master"""
-    # Find all of the files in the 'Etrade' folder
-    files = [join(pathEtrade, f) for f in listdir(pathEtrade) if isfile(join(pathEtrade, f))]
-
-    use_cols: int = 12
-
-    # append all of the files to masters
-    for f in files:
-        with open(f, encoding='ascii', errors='ignore') as fr:
-            data: str = fr.read()
-            data_start: int = -1
-            data_end: int = -1
-            # Etrade places a bad row in the table that says you have
-            # no positions if you don't have any positions.
-            # Must be removed for parsing.
-            bad_rows: List[int] = []
-
-            # Find the row where the header ends and the data begins
-            rows: List[str] = data.split('\n')
-            for i, row in enumerate(rows):
-                columns: List[str] = row.split(',')
-                if data_start != -1 and i < len(rows) -  data_end and len(columns) < 12:
-                    bad_rows.append(i)
-                if data_start == -1 and columns[0] == 'Symbol' and columns[1] == 'Qty #':
-                    data_start = i
-                if data_end == -1 and columns[0] == 'TOTAL':
-                    data_end = len(rows) - i - 1
-
-        fileTOP, fileBOT = read_file(
-            file=data,
-            data_start=data_start,
-            data_end=data_end,
-            use_cols=use_cols,
-            skip_rows_top=[0],
-            na_values=[''],
-            header=0,
-            skip_rows_bot=bad_rows
-        )
+    The frames are always returned in the order of the tasks so the master is the same
+    no matter how many workers are used. Files found in the cache are not parsed again.
 
-        # Get the account name from the top part of the csv
-        name = fileTOP.at[0, fileTOP.columns[0]]
-        del fileTOP
-
-        # Change the format to be the same as the master
-        temp: DataFrame = DataFrame(data={
-            # name
-            MasterColums.ACCOUNT_NAME.value: [name for _ in range(fileBOT.shape[0])],
-            # Symbol
-            MasterColums.SYMBOL.value: fileBOT[fileBOT.columns[0]],  
-            # Quantity
-            MasterColums.QUANTITY.value: fileBOT[fileBOT.columns[1]],
-            # Last Price
-            MasterColums.LAST_PRICE.value: fileBOT[fileBOT.columns[2]],
-            # Current Value
-            MasterColums.CURRENT_VALUE.value: fileBOT[fileBOT.columns[3]],
-            # Total Gain/Loss Dollar
-            MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value: fileBOT[fileBOT.columns[5]],
-            # Total Gain/Loss Percent
-            MasterColums.TOTAL_GAIN_LOSS_PERCENT.value: fileBOT[fileBOT.columns[7]],
-            # Cost Basis Per Share
-            MasterColums.COST_BASIS_PER_SHARE.value: fileBOT[fileBOT.columns[9]],
-            # Cost Basis Total
-            MasterColums.TOTAL_COST_BASIS.value: fileBOT[fileBOT.columns[11]]
-        })       
-
-        # Cash has no quantity or last price for some reason. Set it.
-        for i in range(0, temp.shape[0]):
-            symbol: str = temp.loc[i, MasterColums.SYMBOL.value].lower()
-            
-            if (symbol == 'cash'):
-                temp.loc[i, MasterColums.QUANTITY.value] = temp.loc[i, MasterColums.CURRENT_VALUE.value]
-                temp.loc[i, MasterColums.LAST_PRICE.value] = 1
-
-        # append to master
-        master = master.append(temp, ignore_index=True)
+    Every file is parsed on its own: a file that fails doesn't stop the others, and every
+    parsed file is stored in the cache as soon as it is parsed. A run that stops part way,
+    or a run after a failed file is fixed, only parses the files that are not in the cache.
 
-    return master
+    Args:
+        tasks (Sequence[Tuple[Callable[[str], DataFrame], str]]): Pairs of file parser and file path.
+        workers (int, optional): Number of processes to use. Defaults to 1 (no pool).
+        cache (Optional[StatementCache], optional): Cache of parsed files. Defaults to None (no cache).
+        profiler (Optional[Profiler], optional): Records every parsed file, also in the worker
+            processes. Defaults to None (not profiled).
+        failures (Optional[List[ParseFailure]], optional): Gets the files that could not be parsed.
+            Defaults to None (raise once every other file is parsed).
 
+    Raises:
+        ValueError: Files could not be parsed and there is no failures list.
 
-@DeprecationWarning
-def parse_sprott(master: DataFrame) -> DataFrame:
-    """Parse the sprott files and add them to the master"""
-    # Find all of the files in the 'Sprott' folder
-    files = [join(pathSprott, f) for f in listdir(pathSprott) if isfile(join(pathSprott, f))]
+    Returns:
+        List[DataFrame]: The parsed frame of every task, without the failed ones.
+    """
+    profiling: bool = profiler is not None and profiler.enabled
 
-    # append all of the files to masters
-    for f in files:
-        with open(f, encoding='ascii', errors='ignore') as fr:
-            data: str = fr.read()
-            data_start: int = -1
+    frames: List[Optional[DataFrame]] = [
+        cache.get(f) if cache is not None else None for _, f in tasks
+    ]
+    misses: List[int] = [i for i, frame in enumerate(frames) if frame is None]
+    failed: List[ParseFailure] = []
+
+    def checkpoint(i: int, result: Tuple[Optional[DataFrame], List[StageRecord], Optional[ParseFailure]]):
+        frame, records, failure = result
+        if profiler is not None:
+            profiler.extend(records)
+        if failure is not None:
+            failed.append(failure)
+            return
+
+        frames[i] = frame
+        if cache is not None:
+            # Kept by the journal of the cache, the index is saved once at the end
+            cache.put(tasks[i][1], frame)
+
+    # Parsers that can't be sent to the worker processes run in this one
+    sendable: Dict[int, bool] = {}
+    remote: List[int] = [
+        i for i in misses if workers > 1 and _is_picklable(tasks[i][0], sendable)
+    ]
+    local: List[int] = sorted(set(misses) - set(remote))
+
+    if len(remote) <= 1:
+        for i in misses:
+            checkpoint(i, _run_parser(tasks[i], profiling))
+    else:
+        # Imported here, loading multiprocessing slows down the runs that don't need it
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=min(workers, len(remote))) as executor:
+            futures = {executor.submit(_run_parser, tasks[i], profiling): i for i in remote}
+            for i in local:
+                checkpoint(i, _run_parser(tasks[i], profiling))
+            for future in as_completed(futures):
+                checkpoint(futures[future], future.result())
+
+    if cache is not None:
+        cache.save()
+        print(f'Cache: {cache.hits} hits, {cache.misses} misses')
+
+    # Report the failures in the order of the tasks
+    order: Dict[str, int] = {f: i for i, (_, f) in enumerate(tasks)}
+    failed.sort(key=lambda failure: order[failure.file])
+    if failures is not None:
+        failures.extend(failed)
+    elif len(failed) > 0:
+        raise ValueError('Could not parse ' + '; '.join(f'{failure.file}: {failure.message}' for failure in failed))
+
+    return [frame for frame in frames if frame is not None]
+
+
+def _run_parser(
+        task: Tuple[Callable[[str], DataFrame], str],
+        profile: bool = False
+    ) -> Tuple[Optional[DataFrame], List[StageRecord], Optional[ParseFailure]]:
+    """Run a single (parser, file) task. Module level so that it can be sent to worker processes.
+
+    Returns the frame, the profile records of the task, empty if it isn't profiled, and the
+    failure if the parser raised, in which case there is no frame.
+    """
+    parser, f = task
+    profiler = Profiler(enabled=profile)
+    try:
+        with profiler.stage('parse file', name=f, parser=parser.__name__) as counter:
+            frame = parser(f)
+            counter.rows = frame.shape[0]
+    except Exception as e:
+        return None, profiler.records, ParseFailure(
+            f, parser.__name__, type(e).__name__, str(e), traceback.format_exc())
+    return frame, profiler.records, None
 
-            # Find the row where the header ends and the data begins
-            for i, row in enumerate(data.split('\n')):
-                columns: List[str] = row.split(',')
-                if columns[0] == 'Description':
-                    data_start = i
-                    break
 
+def _is_picklable(parser: Callable[[str], DataFrame], known: Dict[int, bool]) -> bool:
+    # Every parser is only pickled once, the tasks of a broker share it
+    if id(parser) not in known:
         try:
-            fileTOP = pd.read_excel(
-                io.StringIO(data),
-                nrows=1,
-                usecols=np.arange(0, 1)
-            )
-            fileBOT = pd.read_excel(
-                io.StringIO(
-                    data),
-                skiprows=data_start,
-                usecols=np.arange(0, 10)
-            )
-        except:
-            fileTOP = pd.read_csv(
-                io.StringIO(data),
-                nrows=1,
-                usecols=np.arange(0, 1),
-                engine='python',
-                error_bad_lines=False
-            )
-            fileBOT = pd.read_csv(
-                io.StringIO(data),
-                skiprows=data_start,
-                usecols=np.arange(0, 10),
-                engine='python',
-                error_bad_lines=False
-            )
+            pickle.dumps(parser)
+            known[id(parser)] = True
+        except Exception:
+            known[id(parser)] = False
+    return known[id(parser)]
 
-        # Get the name of the account
-        name = fileTOP.at[0, fileTOP.columns[0]][9:26]
-        del fileTOP
-
-        # Change the format to be the same as the master
-        temp = DataFrame(data={
-            # Name
-            MasterColums.ACCOUNT_NAME.value: [name for _ in range(fileBOT.shape[0])],
-            MasterColums.SYMBOL.value: fileBOT[fileBOT.columns[1]],  # Symbol
-            # Description
-            MasterColums.DESCRIPTION.value: fileBOT[fileBOT.columns[0]],
-            # Quantity
-            MasterColums.QUANTITY.value: fileBOT[fileBOT.columns[2]],
-            # Last Price
-            MasterColums.LAST_PRICE.value: fileBOT[fileBOT.columns[3]],
-            # Current Value
-            MasterColums.CURRENT_VALUE.value: fileBOT[fileBOT.columns[4]],
-            # Cost Basis Per Share
-            MasterColums.COST_BASIS_PER_SHARE.value: fileBOT[fileBOT.columns[8]],
-            # Cost Basis Total
-            MasterColums.TOTAL_COST_BASIS.value: fileBOT[fileBOT.columns[9]]
-        })
-
-        temp[MasterColums.CURRENT_VALUE.value].replace(
-            '[\\*]', '', regex=True, inplace=True)
-
-        # append to master
-        master = master.append(temp, ignore_index=True)
-    return master
 
+def write_failures(failures: List[ParseFailure], path: str):
+    """Write the report of the files that could not be parsed, or remove the report of an earlier run if there are none.
 
-@DeprecationWarning
-def parse_ameritrade(master: DataFrame) -> DataFrame:
-    """Parse the Ameritrade files and add them to the master"""
-    # Find all of the files in the 'Ameritrade' folder
-    files = [join(pathAmeritrade, f) for f in listdir(pathAmeritrade) if isfile(join(pathAmeritrade, f))]
+    Args:
+        failures (List[ParseFailure]): The failures.
+        path (str): Path of the JSON report.
+    """
+    if len(failures) == 0:
+        if os.path.exists(path):
+            os.remove(path)
+        return
 
-    # append all of the files to masters
-    for f in files:
-        with open(f, encoding='ascii', errors='ignore') as fr:
-            data = fr.read()
+    with open(path, 'w', encoding='utf-8') as fw:
+        json.dump([failure._asdict() for failure in failures], fw, indent=2)
 
-        try:
-            file = pd.read_excel(io.StringIO(data), skipfooter=1)
-        except:
-            file = pd.read_csv(io.StringIO(data), skipfooter=1,
-                               engine='python', error_bad_lines=False)
-
-        # Get the data into master format
-        temp = DataFrame(data={
-            # name
-            MasterColums.ACCOUNT_NAME.value: [f[len(f)-18:len(f)-5] for i in range(file.shape[0])],
-            # Symbol
-            MasterColums.SYMBOL.value: file[file.columns[0]].str.findall("\\(([^\)]+)\\)").str[0],
-            # Description
-            MasterColums.DESCRIPTION.value: file[file.columns[0]],
-            MasterColums.QUANTITY.value: file[file.columns[1]],  # Quantity
-            MasterColums.LAST_PRICE.value: file[file.columns[6]],  # Last Price
-            # Current Value
-            MasterColums.CURRENT_VALUE.value: file[file.columns[7]],
-            # Total Gain/Loss Dollar
-            MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value: file[file.columns[8]],
-            # Total Gain/Loss Percent
-            MasterColums.TOTAL_GAIN_LOSS_PERCENT.value: file[file.columns[9]],
-            # Cost Basis Per Share
-            MasterColums.COST_BASIS_PER_SHARE.value: file[file.columns[3]],
-            # Cost Basis Total
-            MasterColums.TOTAL_COST_BASIS.value: file[file.columns[4]]
-        })
-
-        # Add to master
-        master = master.append(temp, ignore_index=True)
+    print(f'{len(failures)} files could not be parsed and are not in the master, see {path}:')
+    for failure in failures:
+        print(f'  {failure.file}: {failure.error}: {failure.message}')
 
-    return master
 
+def concat_master(frames: Sequence[DataFrame]) -> DataFrame:
+    """Concatenate frames into a single DataFrame with the master schema.
 
-def parse_canaccord(master: DataFrame) -> DataFrame:
-    """Parse the Canaccord files and add them to the master"""
-    # Find all of the files in the 'Canaccord' folder
-    files = [join(pathCanaccord, f) for f in listdir(pathCanaccord) if isfile(join(pathCanaccord, f))]
+    Every frame is aligned to the MasterColums columns and dtypes before a single concat so that
+    the master is built once instead of being copied for every file. The numbers are float64 and
+    the repetitive text columns are categorical.
 
-    # append all of the files to masters
-    for f in files:
+    Args:
+        frames (Sequence[DataFrame]): Frames with (a subset of) the master columns.
 
-        _, file = read_file(
-            f,
-            data_start=10,
-            use_cols=np.arange(1, 22)
-        )
+    Returns:
+        DataFrame: The master DataFrame.
+    """
+    columns: List[str] = [column.value for column in MasterColums]
+    dtypes: Dict[str, type] = {
+        column: np.float64 if column in NUMBER_COLUMNS else object for column in columns
+    }
+    aligned: List[DataFrame] = [
+        frame.reindex(columns=columns).astype(dtypes) for frame in frames
+    ]
+
+    master: DataFrame = pd.concat(aligned, ignore_index=True) if len(aligned) > 0 \
+        else DataFrame(columns=columns).astype(dtypes)
 
-        # Get the data into master format
-        temp: DataFrame = DataFrame(data={
-            # name
-            MasterColums.ACCOUNT_NAME.value: file[file.columns[2]],
-            # Symbol
-            MasterColums.SYMBOL.value: [it if it.lower() != 'USD999997'.lower() else 'Cash' 
-                                        for it in file[file.columns[0]]],
-            # Description
-            MasterColums.DESCRIPTION.value: file[file.columns[4]],
-            MasterColums.QUANTITY.value: file[file.columns[6]],  # Quantity
-            MasterColums.LAST_PRICE.value: file[file.columns[7]],  # Last Price
-            # Current Value
-            MasterColums.CURRENT_VALUE.value: file[file.columns[12]],
-            # Total Gain/Loss Dollar
-            MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value: [''] * file.shape[0],
-            # Total Gain/Loss Percent
-            MasterColums.TOTAL_GAIN_LOSS_PERCENT.value: [''] * file.shape[0],
-            # Cost Basis Per Share
-            MasterColums.COST_BASIS_PER_SHARE.value: [''] * file.shape[0],
-            MasterColums.TOTAL_COST_BASIS.value: [
-                ''] * file.shape[0]  # Cost Basis Total
-        })
-        
-        remove_bad_characters(temp, 4)
-        remove_bad_characters(temp, 5)
-
-        # Add to master
-        master = master.append(temp, ignore_index=True)
+    # Categories of different frames can't be combined, make them once the text is together
+    master[TEXT_COLUMNS] = master[TEXT_COLUMNS].astype('category')
 
     return master
 
 
-def parse_schwab(master: DataFrame) -> DataFrame:
-    """Parse the schwab files and add them to the master"""
+def drop_empty_quantity(frame: DataFrame) -> DataFrame:
+    """Remove the rows of a parsed file that have no quantity.
+
+    Args:
+        frame (DataFrame): Frame with the master columns.
+
+    Returns:
+        DataFrame: The frame without the rows that have an empty quantity.
+    """
+    return frame.loc[frame[MasterColums.QUANTITY.value].notna()]
+
+
+def apply_cash_rule(frame: DataFrame, rule: CashRule):
+    """Set the quantity and last price of the cash rows of a parsed file.
+
+    Args:
+        frame (DataFrame): Frame with the master columns, modified in place.
+        rule (CashRule): Rule that finds the cash rows.
+    """
+    cells = frame[rule.column.value].astype(str).str.lower()
+
+    if rule.contains:
+        is_cash = pd.Series(False, index=frame.index)
+        for value in rule.values:
+            is_cash |= cells.str.contains(value, regex=False)
+    else:
+        is_cash = cells.isin(rule.values)
+
+    frame.loc[is_cash, MasterColums.QUANTITY.value] = frame.loc[is_cash, MasterColums.CURRENT_VALUE.value]
+    frame.loc[is_cash, MasterColums.LAST_PRICE.value] = 1
+
+
+def parse_fidelity() -> List[DataFrame]:
+    """Parse the fidelity files into frames with the master columns"""
+    # Find all of the files in the 'Fidelity' folder
+    return [parse_fidelity_file(f) for f in list_files(pathFidelity)]
+
+
+def parse_fidelity_file(f: str) -> DataFrame:
+    """Parse a single fidelity file into a frame with the master columns"""
+    return LAYOUT_READERS['fidelity'].parse(f)
+
+
+def parse_etrade() -> List[DataFrame]:
+    """Parse the etrade files into frames with the master columns"""
+    # Find all of the files in the 'Etrade' folder
+    return [parse_etrade_file(f) for f in list_files(pathEtrade)]
+
+
+def parse_etrade_file(f: str) -> DataFrame:
+    """Parse a single etrade file into a frame with the master columns"""
+    return LAYOUT_READERS['etrade'].parse(f)
+
+
+def parse_sprott() -> List[DataFrame]:
+    """Parse the sprott files into frames with the master columns"""
+    warnings.warn('Sprott files are no longer parsed by default', DeprecationWarning, stacklevel=2)
+    # Find all of the files in the 'Sprott' folder
+    return [parse_sprott_file(f) for f in list_files(pathSprott)]
+
+
+def parse_sprott_file(f: str) -> DataFrame:
+    """Parse a single sprott file into a frame with the master columns"""
+    warnings.warn('Sprott files are no longer parsed by default', DeprecationWarning, stacklevel=2)
+    return LAYOUT_READERS['sprott'].parse(f)
+
+
+def parse_ameritrade() -> List[DataFrame]:
+    """Parse the Ameritrade files into frames with the master columns"""
+    warnings.warn('Ameritrade files are no longer parsed by default', DeprecationWarning, stacklevel=2)
+    # Find all of the files in the 'Ameritrade' folder
+    return [parse_ameritrade_file(f) for f in list_files(pathAmeritrade)]
+
+
+def parse_ameritrade_file(f: str) -> DataFrame:
+    """Parse a single ameritrade file into a frame with the master columns"""
+    warnings.warn('Ameritrade files are no longer parsed by default', DeprecationWarning, stacklevel=2)
+    return LAYOUT_READERS['ameritrade'].parse(f)
+
+
+def parse_canaccord() -> List[DataFrame]:
+    """Parse the canaccord files into frames with the master columns"""
+    # Find all of the files in the 'Canaccord' folder
+    return [parse_canaccord_file(f) for f in list_files(pathCanaccord)]
+
+
+def parse_canaccord_file(f: str) -> DataFrame:
+    """Parse a single canaccord file into a frame with the master columns"""
+    return LAYOUT_READERS['canaccord'].parse(f)
+
+
+def parse_schwab() -> List[DataFrame]:
+    """Parse the schwab files into frames with the master columns"""
     # Find all of the files in the 'Schwab' folder
-    files = [join(pathSchwab, f)
-             for f in listdir(pathSchwab) if isfile(join(pathSchwab, f))]
-
-    use_cols: int = 12
-
-    # append all of the files to masters
-    for f in files:
-        with open(f, encoding='ascii', errors='ignore') as fr:
-            data: str = fr.read()
-            data_start: int = -1
-            data_end: int = -1
-
-            # Find the row where the header ends and the data begins
-            rows: List[str] = data.split('\n')
-            for i, row in enumerate(rows):
-                columns: List[str] = row.split(',')
-                if data_start == -1 and 'Symbol' in columns[0] and 'Description' in columns[1]:
-                    data_start = i
-                if data_end == -1 and 'Account Total' in columns[0]:
-                    data_end = len(rows) - i - 1
-
-        fileTOP, fileBOT = read_file(
-            file=data,
-            data_start=data_start,
-            data_end=data_end,
-            use_cols=use_cols,
-            na_values='--'
-        )
+    return [parse_schwab_file(f) for f in list_files(pathSchwab)]
 
-        # Get the account name from the top part of the csv
-        name: str = fileTOP.columns[0]
-        dot_index: int = name.find('...')
-        name = 'Schwab - ' + name[dot_index:dot_index+6]
-        del fileTOP
-
-        # Get rid of bad characters and convert strings to floats
-        remove_bad_characters(fileBOT, 3)
-        remove_bad_characters(fileBOT, 6)
-        remove_bad_characters(fileBOT, 10)
-        fileBOT[fileBOT.columns[10]] = pd.to_numeric(
-            fileBOT[fileBOT.columns[10]])
-        remove_bad_characters(fileBOT, 11)
-        fileBOT[fileBOT.columns[11]] = pd.to_numeric(
-            fileBOT[fileBOT.columns[11]])
-        remove_bad_characters(fileBOT, 2)
-        fileBOT[fileBOT.columns[2]] = pd.to_numeric(
-            fileBOT[fileBOT.columns[2]])
-        remove_bad_characters(fileBOT, 9)
-        fileBOT[fileBOT.columns[9]] = pd.to_numeric(
-            fileBOT[fileBOT.columns[9]])
-
-        # Change the format to be the same as the master
-        temp = DataFrame(data={
-            # name
-            MasterColums.ACCOUNT_NAME.value: [name for _ in range(fileBOT.shape[0])],
-            MasterColums.SYMBOL.value: fileBOT[fileBOT.columns[0]],  # Symbol
-            # Quantity
-            MasterColums.QUANTITY.value: fileBOT[fileBOT.columns[2]],
-            # Last Price
-            MasterColums.LAST_PRICE.value: fileBOT[fileBOT.columns[3]],
-            # Current Value
-            MasterColums.CURRENT_VALUE.value: fileBOT[fileBOT.columns[6]],
-            # Total Gain/Loss Dollar
-            MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value: [  # Always positive, use percentage to check if it should be negative
-                -1 * dollar if percent < 0 else dollar
-                for dollar, percent in zip(fileBOT[fileBOT.columns[11]], fileBOT[fileBOT.columns[10]])],
-            # Total Gain/Loss Percent
-            MasterColums.TOTAL_GAIN_LOSS_PERCENT.value: fileBOT[fileBOT.columns[10]],
-            # Calculate Cost Basis Per Share
-            MasterColums.COST_BASIS_PER_SHARE.value: [
-                p/q
-                for p, q in zip(fileBOT[fileBOT.columns[9]], fileBOT[fileBOT.columns[2]])],
-            # Cost Basis Total
-            MasterColums.TOTAL_COST_BASIS.value: fileBOT[fileBOT.columns[9]],
-        })
-        
-        # Cash has no quantity or last price for some reason. Set it.
-        for i in range(0, temp.shape[0]):
-            symbol: str = temp.loc[i, MasterColums.SYMBOL.value].lower()
-            
-            if ('cash' in symbol):
-                temp.loc[i, MasterColums.QUANTITY.value] = temp.loc[i, MasterColums.CURRENT_VALUE.value]
-                temp.loc[i, MasterColums.LAST_PRICE.value] = 1
-
-        # append to master
-        master = master.append(temp, ignore_index=True)
 
-    return master
+def parse_schwab_file(f: str) -> DataFrame:
+    """Parse a single schwab file into a frame with the master columns"""
+    return LAYOUT_READERS['schwab'].parse(f)
+
+
+def _join_fidelity_account(frame: DataFrame, extras: DataFrame):
+    """Older exports have one account column, newer ones an account number and an account name"""
+    if frame[MasterColums.ACCOUNT_NAME.value].isna().all() and \
+            'number' in extras.columns and 'name' in extras.columns:
+        frame[MasterColums.ACCOUNT_NAME.value] = extras['number'].str.cat(extras['name'], sep=" ")
+
+
+def _strip_percent_signs(frame: DataFrame, extras: DataFrame):
+    """Fidelity text has the percent signs removed, such as the rates in the descriptions of bonds"""
+    for column in (MasterColums.ACCOUNT_NAME.value, MasterColums.SYMBOL.value, MasterColums.DESCRIPTION.value):
+        frame[column] = frame[column].str.replace('%', '', regex=False)
+
+
+def _fill_description(frame: DataFrame, extras: DataFrame):
+    frame[MasterColums.DESCRIPTION.value] = frame[MasterColums.DESCRIPTION.value].fillna('').astype(str)
+
+
+def _strip_stars(frame: DataFrame, extras: DataFrame):
+    """Sprott marks some values with a star"""
+    frame[MasterColums.CURRENT_VALUE.value] = \
+        frame[MasterColums.CURRENT_VALUE.value].str.replace('*', '', regex=False)
+
+
+def _symbol_from_description(frame: DataFrame, extras: DataFrame):
+    """Ameritrade puts the symbol in parentheses in the description"""
+    frame[MasterColums.SYMBOL.value] = \
+        frame[MasterColums.DESCRIPTION.value].str.findall("\\(([^\\)]+)\\)").str[0]
+
+
+def _rename_canaccord_cash(frame: DataFrame, extras: DataFrame):
+    symbol = frame[MasterColums.SYMBOL.value]
+    frame[MasterColums.SYMBOL.value] = symbol.where(symbol.str.lower() != 'usd999997', 'Cash')
+
+
+def _sign_schwab_gain(frame: DataFrame, extras: DataFrame):
+    """Total gain/loss dollar is always positive, use the percentage to check if it should be negative"""
+    dollar = frame[MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value]
+    frame[MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value] = np.where(
+        frame[MasterColums.TOTAL_GAIN_LOSS_PERCENT.value] < 0, -dollar.abs(), dollar)
+
+
+def _schwab_cost_per_share(frame: DataFrame, extras: DataFrame):
+    frame[MasterColums.COST_BASIS_PER_SHARE.value] = \
+        frame[MasterColums.TOTAL_COST_BASIS.value] / frame[MasterColums.QUANTITY.value]
+
+
+# The functions of the layouts are module level so that the layouts can be pickled
+
+
+def _is_fidelity_end(columns: List[str]) -> bool:
+    return columns[0] == ''
+
+
+def _is_etrade_start(columns: List[str]) -> bool:
+    return columns[0] == 'Symbol' and columns[1] == 'Qty #'
+
+
+def _is_etrade_end(columns: List[str]) -> bool:
+    return columns[0] == 'TOTAL'
+
+
+def _etrade_account(top: List[List[str]], f: str) -> str:
+    # The account is below the account summary header
+    return top[2][0]
+
+
+def _is_sprott_start(columns: List[str]) -> bool:
+    return columns[0] == 'Description'
+
+
+def _sprott_account(top: List[List[str]], f: str) -> str:
+    return top[1][0][9:26]
+
+
+def _ameritrade_account(top: List[List[str]], f: str) -> str:
+    # The account number is at the end of the file name
+    return f[len(f)-18:len(f)-5]
+
+
+def _is_schwab_start(columns: List[str]) -> bool:
+    return 'Symbol' in columns[0] and 'Description' in columns[1]
+
+
+def _is_schwab_end(columns: List[str]) -> bool:
+    return 'Account Total' in columns[0]
+
+
+def _schwab_account(top: List[List[str]], f: str) -> str:
+    return 'Schwab - ' + top[0][0][top[0][0].find('...'):top[0][0].find('...')+6]
+
+
+# Layout of the statement files of every broker
+BROKER_LAYOUTS: Dict[str, BrokerLayout] = {
+    # The data starts at the first row and ends at the first row without an account number
+    'fidelity': BrokerLayout(
+        columns={
+            MasterColums.ACCOUNT_NAME: ('Account Name/Number',),
+            MasterColums.SYMBOL: 'Symbol',
+            MasterColums.DESCRIPTION: 'Description',
+            MasterColums.QUANTITY: 'Quantity',
+            MasterColums.LAST_PRICE: 'Last Price',
+            MasterColums.CURRENT_VALUE: 'Current Value',
+            MasterColums.TOTAL_GAIN_LOSS_DOLLAR: 'Total Gain/Loss Dollar',
+            MasterColums.TOTAL_GAIN_LOSS_PERCENT: 'Total Gain/Loss Percent',
+            # Renamed in newer exports
+            MasterColums.COST_BASIS_PER_SHARE: ('Cost Basis Per Share', 'Average Cost Basis'),
+            MasterColums.TOTAL_COST_BASIS: ('Total Cost Basis', 'Cost Basis Total')
+        },
+        is_end=_is_fidelity_end,
+        na_values=('--', 'n/a'),
+        extra_columns={'number': ('Account Number',), 'name': ('Account Name',)},
+        prepare=(_join_fidelity_account, _strip_percent_signs),
+        fixups=(_fill_description,),
+        cash_rule=CASH_RULES['fidelity']
+    ),
+    # Etrade places a bad row in the table that says you have
+    # no positions if you don't have any positions, it has too few cells.
+    'etrade': BrokerLayout(
+        columns={
+            MasterColums.SYMBOL: 0,
+            MasterColums.QUANTITY: 1,
+            MasterColums.LAST_PRICE: 2,
+            MasterColums.CURRENT_VALUE: 3,
+            MasterColums.TOTAL_GAIN_LOSS_DOLLAR: 5,
+            MasterColums.TOTAL_GAIN_LOSS_PERCENT: 7,
+            MasterColums.COST_BASIS_PER_SHARE: 9,
+            MasterColums.TOTAL_COST_BASIS: 11
+        },
+        is_start=_is_etrade_start,
+        is_end=_is_etrade_end,
+        min_columns=12,
+        account=_etrade_account,
+        cash_rule=CASH_RULES['etrade']
+    ),
+    'sprott': BrokerLayout(
+        columns={
+            MasterColums.DESCRIPTION: 0,
+            MasterColums.SYMBOL: 1,
+            MasterColums.QUANTITY: 2,
+            MasterColums.LAST_PRICE: 3,
+            MasterColums.CURRENT_VALUE: 4,
+            MasterColums.COST_BASIS_PER_SHARE: 8,
+            MasterColums.TOTAL_COST_BASIS: 9
+        },
+        is_start=_is_sprott_start,
+        account=_sprott_account,
+        prepare=(_strip_stars,)
+    ),
+    'ameritrade': BrokerLayout(
+        columns={
+            MasterColums.DESCRIPTION: 0,
+            MasterColums.QUANTITY: 1,
+            MasterColums.COST_BASIS_PER_SHARE: 3,
+            MasterColums.TOTAL_COST_BASIS: 4,
+            MasterColums.LAST_PRICE: 6,
+            MasterColums.CURRENT_VALUE: 7,
+            MasterColums.TOTAL_GAIN_LOSS_DOLLAR: 8,
+            MasterColums.TOTAL_GAIN_LOSS_PERCENT: 9
+        },
+        footer_rows=1,
+        account=_ameritrade_account,
+        prepare=(_symbol_from_description,)
+    ),
+    # The header is on the 11th row and the first column is empty
+    'canaccord': BrokerLayout(
+        columns={
+            MasterColums.ACCOUNT_NAME: 3,
+            MasterColums.SYMBOL: 1,
+            MasterColums.DESCRIPTION: 5,
+            MasterColums.QUANTITY: 7,
+            MasterColums.LAST_PRICE: 8,
+            MasterColums.CURRENT_VALUE: 13
+        },
+        data_start=10,
+        prepare=(_rename_canaccord_cash,)
+    ),
+    'schwab': BrokerLayout(
+        columns={
+            MasterColums.SYMBOL: 0,
+            MasterColums.QUANTITY: 2,
+            MasterColums.LAST_PRICE: 3,
+            MasterColums.CURRENT_VALUE: 6,
+            MasterColums.TOTAL_COST_BASIS: 9,
+            MasterColums.TOTAL_GAIN_LOSS_PERCENT: 10,
+            MasterColums.TOTAL_GAIN_LOSS_DOLLAR: 11
+        },
+        is_start=_is_schwab_start,
+        is_end=_is_schwab_end,
+        na_values=('--',),
+        account=_schwab_account,
+        fixups=(_sign_schwab_gain, _schwab_cost_per_share),
+        cash_rule=CASH_RULES['schwab']
+    )
+}
+
+
+class LayoutReader:
+    """A broker layout compiled into a reader of its statement files.
+
+    CSV files are memory-mapped and the boundaries of the table are found on the bytes. Only
+    the byte ranges of the table are streamed to the CSV parser, which drops the bytes that are
+    not ASCII, with only the columns of the layout, all read as text so no types are guessed.
+    The numbers are cleaned once, after the columns are mapped.
+    """
+
+    def __init__(self, layout: BrokerLayout):
+        """
+        Args:
+            layout (BrokerLayout): Layout of the statement files.
+        """
+        self.layout: BrokerLayout = layout
+        self._sources: Dict[str, ColumnSource] = {
+            column.value: source for column, source in layout.columns.items()
+        }
+        self._sources.update(layout.extra_columns)
+        self._extra_columns: List[str] = list(layout.extra_columns)
+        self._na_values: List[str] = list(layout.na_values)
+
+        # Layouts with only column positions don't depend on the header of the file
+        self._positions: Optional[Dict[str, Optional[int]]] = None
+        if all(isinstance(source, int) for source in self._sources.values()):
+            self._positions = self._resolve([])
+
+    def parse(self, f: str, engine: str = 'c') -> DataFrame:
+        """Parse a whole statement file into a frame with the master columns.
+
+        Args:
+            f (str): Path of the file.
+            engine (str, optional): Reader of CSV tables, one of ENGINES. Defaults to 'c'.
+
+        Returns:
+            DataFrame: The parsed file.
+        """
+        return next(self.read(f, engine=engine))
+
+    def read(self, f: str, chunksize: Optional[int] = None, engine: str = 'c') -> Iterator[DataFrame]:
+        """Parse a statement file, in chunks of table rows if a chunk size is given.
+
+        Workbooks are always read whole. The arrow engine reads the table in one piece with
+        pyarrow, its text columns are Arrow strings. Tables with rows that pyarrow can't read
+        like the C parser, such as rows with missing cells, and chunked reads use the C parser.
+
+        Args:
+            f (str): Path of the file.
+            chunksize (Optional[int], optional): Number of table rows per chunk. Defaults to None (one chunk).
+            engine (str, optional): Reader of CSV tables, one of ENGINES. Defaults to 'c'.
+
+        Raises:
+            ValueError: The start of the table was not found.
+
+        Yields:
+            DataFrame: Frames with the master columns, in the order of the file.
+        """
+        if is_excel(f):
+            yield self._read_workbook(f)
+            return
+
+        with open(f, 'rb') as fr:
+            if os.fstat(fr.fileno()).st_size == 0:
+                raise ValueError(f'Could not find the start of the data in {f}')
+
+            with mmap.mmap(fr.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                scan = self._scan(buffer)
+                if scan is None:
+                    raise ValueError(f'Could not find the start of the data in {f}')
+
+                header: List[str] = next(csv.reader([scan.header]), [])
+                positions = self._positions if self._positions is not None else self._resolve(header)
+                use_cols: List[int] = sorted({position for position in positions.values() if position is not None})
+                top_cells: List[List[str]] = list(csv.reader(scan.top))
+
+                if engine == 'arrow' and chunksize is None and _is_ascii(buffer, scan.ranges):
+                    table = _read_arrow_table(
+                        _ByteRanges.open(buffer, scan.ranges),
+                        header,
+                        next(csv.reader([scan.first_row]), []) if scan.first_row is not None else None,
+                        use_cols,
+                        self._na_values
+                    )
+                    if table is not None:
+                        yield self._normalize(table, positions, top_cells, f)
+                        return
+
+                # The C parser decodes the table and drops the bytes that are not ASCII
+                tables = pd.read_csv(
+                    _ByteRanges.open(buffer, scan.ranges),
+                    encoding='ascii',
+                    encoding_errors='ignore',
+                    header=0,
+                    usecols=use_cols,
+                    dtype=str,
+                    na_values=self._na_values,
+                    on_bad_lines='warn',
+                    index_col=False,
+                    chunksize=chunksize
+                )
+
+                for table in ([tables] if chunksize is None else tables):
+                    table.columns = use_cols
+                    yield self._normalize(table, positions, top_cells, f)
+
+    def _scan(self, buffer: mmap.mmap) -> Optional['_TableScan']:
+        """Find the table of a memory-mapped CSV statement, None if its start is not found.
+
+        Only the rows above the table and the rows checked for the end of the table are
+        decoded, one at a time; the table itself is never copied.
+        """
+        layout = self.layout
+        size = len(buffer)
+
+        # Find the row where the header ends and the data begins
+        top: List[str] = []
+        header: Optional[str] = None
+        start = 0
+        while start < size:
+            end = _row_end(buffer, start)
+            row = buffer[start:end].decode('ascii', errors='ignore')
+            if (layout.is_start(row.rstrip('\r\n').split(',')) if layout.is_start is not None
+                    else len(top) == layout.data_start):
+                header = row
+                break
+            top.append(row)
+            start = end
+
+        if header is None:
+            return None
+
+        table_start = start
+        start = _row_end(buffer, start)
+
+        # Without an end row, skipped rows or a footer the table runs to the end of the file
+        if layout.is_end is None and layout.min_columns == 0 and layout.footer_rows == 0:
+            first_end = _row_end(buffer, start) if start < size else start
+            first_row = buffer[start:first_end].decode('ascii', errors='ignore') if start < size else None
+            return _TableScan(top, header, first_row, [(table_start, size)])
+
+        ranges: List[Tuple[int, int]] = [(table_start, start)]
+        first_row: Optional[str] = None
+        # Starts of the kept rows that can be part of the footer
+        last_rows: Deque[int] = deque(maxlen=layout.footer_rows)
+        while start < size:
+            end = _row_end(buffer, start)
+            row = buffer[start:end].decode('ascii', errors='ignore')
+            columns: List[str] = row.rstrip('\r\n').split(',')
+            if layout.is_end is not None and layout.is_end(columns):
+                break
+            if len(columns) >= layout.min_columns:
+                if first_row is None:
+                    first_row = row
+                if ranges[-1][1] == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+                if layout.footer_rows > 0:
+                    last_rows.append(start)
+            start = end
+
+        if len(last_rows) > 0:
+            # Cut the table before the first footer row
+            cut = last_rows[0]
+            ranges = [(range_start, min(range_end, cut)) for range_start, range_end in ranges if range_start < cut]
+            if ranges[-1][1] == _row_end(buffer, table_start):
+                first_row = None
+
+        return _TableScan(top, header, first_row, ranges)
+
+    def _read_workbook(self, f: str) -> DataFrame:
+        layout = self.layout
+        with pd.ExcelFile(f) as workbook:
+            grid: DataFrame = workbook.parse(header=None, dtype=object)
+        rows: List[List[str]] = grid.fillna('').astype(str).values.tolist()
+
+        start: Optional[int] = layout.data_start if layout.is_start is None else \
+            next((i for i, row in enumerate(rows) if layout.is_start(row)), None)
+        if start is None or start >= len(rows):
+            raise ValueError(f'Could not find the start of the data in {f}')
+
+        end: int = len(rows)
+        if layout.is_end is not None:
+            end = next((i for i in range(start + 1, len(rows)) if layout.is_end(rows[i])), end)
+        end = max(start + 1, end - layout.footer_rows)
+
+        positions = self._positions if self._positions is not None else self._resolve(rows[start])
+        use_cols: List[int] = sorted({position for position in positions.values() if position is not None})
+
+        table: DataFrame = grid.iloc[start + 1:end].reindex(columns=use_cols).reset_index(drop=True)
+        # Read the cells as text like the CSV tables, numbers of the workbook are cleaned with the others
+        table = table.astype(str).where(table.notna())
+        if self._na_values:
+            table = table.mask(table.isin(self._na_values))
+
+        return self._normalize(table, positions, rows[:start], f)
+
+    def _resolve(self, header: List[str]) -> Dict[str, Optional[int]]:
+        """Find the position of every column of the layout in the header of a table"""
+        positions: Dict[str, Optional[int]] = {}
+        for name, source in self._sources.items():
+            if isinstance(source, int):
+                positions[name] = source
+                continue
+            names = (source,) if isinstance(source, str) else source
+            positions[name] = next((header.index(header_name) for header_name in names if header_name in header), None)
+        return positions
+
+    def _normalize(
+            self,
+            table: DataFrame,
+            positions: Dict[str, Optional[int]],
+            top: List[List[str]],
+            f: str
+        ) -> DataFrame:
+        """Convert a table read with the column positions as its columns into a frame with the master columns"""
+        layout = self.layout
+
+        def column(name: str) -> pd.Series:
+            position = positions[name]
+            if position is None:
+                return pd.Series(np.nan, index=table.index, dtype=object)
+            return table[position]
+
+        frame: DataFrame = DataFrame({
+            master_column.value: column(master_column.value) for master_column in layout.columns
+        }, index=table.index)
+        if MasterColums.ACCOUNT_NAME not in layout.columns and layout.account is not None:
+            frame[MasterColums.ACCOUNT_NAME.value] = layout.account(top, f)
+
+        extras: DataFrame = DataFrame({
+            name: column(name) for name in self._extra_columns if positions[name] is not None
+        }, index=table.index)
+
+        for fixup in layout.prepare:
+            fixup(frame, extras)
+
+        # Get rid of special characters and convert strings to floats
+        clean_numbers(frame)
+
+        for fixup in layout.fixups:
+            fixup(frame, extras)
+
+        # Cash has no quantity or last price. Set it.
+        if layout.cash_rule is not None:
+            apply_cash_rule(frame, layout.cash_rule)
+
+        return frame
+
+
+class BrokerParser:
+    """Parses a single file of a broker with its layout.
+
+    Only the name of a built in broker is sent to worker processes. The layout of a registered
+    broker is sent with it, since worker processes that are spawned rather than forked only
+    have the built in layouts.
+    """
+
+    def __init__(self, broker: str, engine: str = 'c', layout: Optional[BrokerLayout] = None):
+        self.broker: str = broker
+        self.engine: str = engine
+        # Layout of a registered broker, None for the built in brokers
+        self.layout: Optional[BrokerLayout] = layout
+        self.__name__: str = f'parse_{broker}_file'
+
+    def __call__(self, f: str) -> DataFrame:
+        reader = LAYOUT_READERS.get(self.broker)
+        if self.layout is not None and (reader is None or reader.layout != self.layout):
+            # A spawned worker process, compile the layout once
+            reader = LayoutReader(self.layout)
+            LAYOUT_READERS[self.broker] = reader
+        return reader.parse(f, self.engine)
+
+
+# Compiled reader of every broker layout
+LAYOUT_READERS: Dict[str, LayoutReader] = {
+    broker: LayoutReader(layout) for broker, layout in BROKER_LAYOUTS.items()
+}
+
+# Parser of a single file of every broker
+FILE_PARSERS: Dict[str, Callable[[str], DataFrame]] = {
+    broker: BrokerParser(broker) for broker in BROKER_LAYOUTS
+}
+
+
+def register_broker(broker: str, layout: BrokerLayout, path: Optional[str] = None):
+    """Add a broker, or change the layout of one.
+
+    The layout is sent to the worker processes of build_master with every file of the broker.
+    Its functions (is_start, is_end, account, prepare and fixups) must be module level functions
+    for that: a layout that can't be pickled, such as one with lambdas, still works but its
+    files are parsed in the main process.
+
+    Args:
+        broker (str): Name of the broker.
+        layout (BrokerLayout): Layout of its statement files.
+        path (Optional[str], optional): Default folder of its files, relative to the current directory.
+            Defaults to None (not parsed by default).
+    """
+    BROKER_LAYOUTS[broker] = layout
+    LAYOUT_READERS[broker] = LayoutReader(layout)
+    FILE_PARSERS[broker] = BrokerParser(broker, layout=layout)
+    if path is not None:
+        DEFAULT_PATHS[broker] = path
+
+
+def iter_file_chunks(broker: str, f: str, chunksize: int) -> Iterator[DataFrame]:
+    """Parse a file in chunks of rows, each converted to a frame with the master columns.
+
+    Workbooks are parsed as a single chunk.
+
+    Args:
+        broker (str): Name of the broker in FILE_PARSERS.
+        f (str): Path of the file.
+        chunksize (int): Number of table rows per chunk.
+
+    Returns:
+        Iterator[DataFrame]: The parsed chunks, in the order of the file.
+    """
+    return LAYOUT_READERS[broker].read(f, chunksize)
+
 
+def resolve_engine(engine: str) -> str:
+    """Get the engine a run can use: the C engine replaces the arrow engine when pyarrow is missing.
 
-def read_file(
-        file: str, 
-        data_start: Optional[int],
-        use_cols: Optional[Union[int, List[int]]]=None, 
-        data_end: int=0, 
-        skip_rows_top=None,
-        header: Union[int, Sequence[int], str, None] ='infer',
-        na_values: Optional[Union[str, List[str]]]=None,
-        skip_rows_bot: List[int] = []
-    ) -> Tuple[DataFrame, DataFrame]:
-    """Read a Excel or CSV file and convert them to Pandas dataframes.
+    Args:
+        engine (str): One of ENGINES.
+
+    Returns:
+        str: The engine to use.
+    """
+    if engine == 'arrow' and _import_pyarrow() is None:
+        print('pyarrow is not installed, reading the files with the C engine')
+        return 'c'
+    return engine
+
+
+class _TableScan(NamedTuple):
+    """Where the table of a CSV statement is"""
+    # Rows above the table
+    top: List[str]
+    header: str
+    # First row of the table after the header, None if it has no rows
+    first_row: Optional[str]
+    # Byte ranges of the header and the rows of the table, rows that are skipped are between them
+    ranges: List[Tuple[int, int]]
+
+
+class _ByteRanges(io.RawIOBase):
+    """Read only raw stream of byte ranges of a buffer, such as the table rows of a memory-mapped file."""
+
+    def __init__(self, buffer: mmap.mmap, ranges: List[Tuple[int, int]]):
+        self._buffer: mmap.mmap = buffer
+        self._ranges: Deque[Tuple[int, int]] = deque(ranges)
+
+    @classmethod
+    def open(cls, buffer: mmap.mmap, ranges: List[Tuple[int, int]]) -> io.BufferedReader:
+        return io.BufferedReader(cls(buffer, ranges))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while len(self._ranges) > 0:
+            start, end = self._ranges[0]
+            if start >= end:
+                self._ranges.popleft()
+                continue
+
+            size = min(len(b), end - start)
+            b[:size] = self._buffer[start:start + size]
+            self._ranges[0] = (start + size, end)
+            return size
+
+        return 0
+
+
+def _row_end(buffer: mmap.mmap, start: int) -> int:
+    """Position after the end of the row starting at start, its newline included"""
+    end = buffer.find(b'\n', start)
+    return len(buffer) if end < 0 else end + 1
+
+
+def _is_ascii(buffer: mmap.mmap, ranges: List[Tuple[int, int]]) -> bool:
+    """Tell if the byte ranges of a buffer only hold ASCII, without copying them"""
+    for start, end in ranges:
+        if end > start and np.frombuffer(buffer, dtype=np.uint8, count=end - start, offset=start).max() >= 0x80:
+            return False
+    return True
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+    except ImportError:
+        return None
+
+    return pyarrow, pyarrow.csv, pyarrow.compute
+
+
+def _is_arrow_string(column: pd.Series) -> bool:
+    return isinstance(column.dtype, pd.StringDtype) and column.dtype.storage == 'pyarrow'
+
+
+def _clean_arrow_numbers(column: pd.Series) -> np.ndarray:
+    """clean_numbers of a column of Arrow strings, with the pyarrow compute kernels instead of a regex per cell"""
+    pa, _, pc = _import_pyarrow()
+
+    cells = pa.array(column.array)
+    negative = pc.fill_null(pc.match_substring_regex(cells, NEGATIVE_NUMBER.pattern), False)
+    negative = negative.to_pandas().to_numpy(dtype=bool)
+    cleaned = pc.replace_substring_regex(cells, BAD_CHARACTERS.pattern, '')
+
+    # Converted by pandas, pyarrow rounds some long decimals differently
+    numbers = pd.to_numeric(cleaned.to_pandas(), errors='coerce').to_numpy(dtype=np.float64)
+    numbers[negative] = -np.abs(numbers[negative])
+
+    return numbers
+
+
+def _read_arrow_table(
+        source: io.BufferedReader,
+        header: List[str],
+        first_row: Optional[List[str]],
+        use_cols: List[int],
+        na_values: Sequence[str]
+    ) -> Optional[DataFrame]:
+    """Read a table, header row first, with the multithreaded pyarrow CSV reader.
+
+    Reads the columns the C parser would read with usecols, as Arrow strings with the same
+    missing values. Like the C parser, a table can have one more cell per row than its header,
+    the extra cells are dropped, and rows with too many cells are skipped.
 
     Args:
-        file (str): Excel file path or CSV file contents
-        data_start (int): Number of rows to skip before the data is actually shown
-        use_cols (int, optional): Number of columns to read. Defaults to None.
-        data_end (int, optional): Number of columns to skip at the end of the sheet. Defaults to 0.
-        skip_rows_top (int, optional): Number of rows to skip to get the correct data for the first dataframe. Defaults to None.
-        header (Union[int, Sequence[int], Literal["infer"], None], optional): Header names to use. Defaults to 'infer'.
-        na_values (Optional[Union[str, List[str]]], optional): The null values in the shpreadsheet. Defaults to None.
+        source (io.BufferedReader): The bytes of the table.
+        header (List[str]): Cells of the header row.
+        first_row (Optional[List[str]]): Cells of the first row after the header, None if there is none.
+        use_cols (List[int]): Positions of the columns to read.
+        na_values (Sequence[str]): Missing values besides the pandas defaults.
 
     Returns:
-        Tuple[DataFrame, DataFrame]: 2 dataframes. The first is a single row dataframe used for extracting the
-        account names if needed. The second contains the data.
+        Optional[DataFrame]: The table with the column positions as its columns, or None if a
+        row has too few cells, which the C parser fills with missing values and pyarrow can't,
+        or if the default missing values of the C parser can't be found.
     """
-    fileTOP: Union[DataFrame, None] = None
-    fileBOT: Union[DataFrame, None] = None
-    
     try:
-        fileTOP = pd.read_excel(
-            file,
-            nrows=1,
-            skiprows=skip_rows_top
-        )
-        fileBOT = pd.read_excel(
-            file,
-            header=header,
-            skiprows=list(range(data_start)) + skip_rows_bot if data_start != None else skip_rows_bot,
-            skipfooter=data_end,
-            usecols=(range(use_cols) if use_cols is not None else None) 
-                if isinstance(use_cols, int) else 
-                (use_cols if use_cols is not None else None),
-            na_values=na_values
-        )
-    except Exception as e:
-        fileTOP = pd.read_csv(
-            io.StringIO(file),
-            nrows=1,
-            skiprows=skip_rows_top,
-            engine='python',
-            on_bad_lines='warn'
-        )
-        fileBOT = pd.read_csv(
-            io.StringIO(file),
-            header=header,
-            skiprows=list(range(data_start)) + skip_rows_bot if data_start != None else skip_rows_bot,
-            skipfooter=data_end,
-            usecols=(range(use_cols) if use_cols is not None else None) 
-                if isinstance(use_cols, int) else 
-                (use_cols if use_cols is not None else None),
-            engine='python',
-            on_bad_lines='warn',
-            na_values=na_values,
-            index_col=False
+        # Private to pandas, imported here so that a pandas without it only loses the arrow engine
+        from pandas._libs.parsers import STR_NA_VALUES
+    except ImportError:
+        return None
+
+    pa, pa_csv, _ = _import_pyarrow()
+
+    if first_row is None or len(use_cols) == 0 or use_cols[-1] >= len(header):
+        return None
+
+    names: List[str] = [str(i) for i in range(max(len(header), len(first_row)))]
+    short_rows: List[int] = []
+
+    def invalid_row(row) -> str:
+        if row.actual_columns < row.expected_columns:
+            short_rows.append(row.number)
+        return 'skip'
+
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(column_names=names, skip_rows=1, use_threads=True),
+        parse_options=pa_csv.ParseOptions(invalid_row_handler=invalid_row),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=[names[i] for i in use_cols],
+            column_types={names[i]: pa.string() for i in use_cols},
+            # The missing values of the C parser are its defaults and the ones of the layout
+            null_values=sorted(STR_NA_VALUES | set(na_values)),
+            strings_can_be_null=True
         )
+    )
+    if len(short_rows) > 0:
+        return None
+
+    frame: DataFrame = table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+    frame.columns = use_cols
+    return frame
 
-    return fileTOP, fileBOT
 
+def clean_numbers(dataframe: DataFrame, columns: Optional[Sequence[str]] = None):
+    """Removes currency formatting from number strings and converts the columns to floats.
 
-def remove_bad_characters(dataframe: DataFrame, index: int):
-    """Removes currency formatting from number strings for a dataframe column.
+    All of the columns are cleaned in one pass. '$', ',', '%', '+' and spaces are removed and
+    numbers in parentheses are negative. Cells that are not numbers become NaN. Columns of Arrow
+    strings, read by the arrow engine, are cleaned with the pyarrow kernels.
 
     Args:
-        dataframe (DataFrame): Dataframe to format the column for.
-        index (int): Index of the column to format.
+        dataframe (DataFrame): Dataframe to format the columns for, modified in place.
+        columns (Optional[Sequence[str]], optional): Columns to format. Defaults to the number
+            columns of the master that are in the dataframe.
     """
-    dataframe[dataframe.columns[index]].replace(
-        '[%\\+\\(\\)$,]',
-        '', 
-        regex=True, 
-        inplace=True
-    )
+    if columns is None:
+        columns = [column for column in NUMBER_COLUMNS if column in dataframe.columns]
+
+    # Arrow strings of the arrow engine are cleaned by the pyarrow kernels
+    arrow_columns: List[str] = [column for column in columns if _is_arrow_string(dataframe[column])]
+    for column in arrow_columns:
+        dataframe[column] = _clean_arrow_numbers(dataframe[column])
+
+    columns = [column for column in columns if column not in arrow_columns]
+    if len(columns) == 0:
+        return
+
+    # All of the columns, one after the other
+    cells = pd.Series(dataframe[columns].to_numpy(dtype=object).ravel(order='F')).astype(str)
+
+    negative = cells.str.match(NEGATIVE_NUMBER)
+    numbers = pd.to_numeric(cells.str.replace(BAD_CHARACTERS, '', regex=True), errors='coerce')
+    numbers[negative] = -numbers[negative].abs()
+
+    dataframe[columns] = numbers.to_numpy(dtype=np.float64).reshape((len(columns), -1)).T
 
 
 if (__name__ == "__main__"):
-    try:
-        if os.path.exists('error.log'):
-            os.remove("error.log")
+    arg_parser = ArgumentParser(description='Create the summary master from the broker files.')
+    arg_parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='number of processes used to parse the files (default: 1)'
+    )
+    arg_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='parse every file again instead of reusing the cached files'
+    )
+    arg_parser.add_argument(
+        '--cache-dir',
+        default='.summary_cache',
+        help='folder of the parsed file cache (default: .summary_cache)'
+    )
+    arg_parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=256,
+        metavar='MB',
+        help='size limit of the parsed file cache in MB (default: 256)'
+    )
+    arg_parser.add_argument(
+        '--concise',
+        action='store_true',
+        help='also create the concise summary from the master in memory'
+    )
+    arg_parser.add_argument(
+        '--no-master-csv',
+        action='store_true',
+        help="don't write the master file"
+    )
+    arg_parser.add_argument(
+        '--snapshot-store',
+        metavar='DIR',
+        help='also add the master to the Parquet snapshot store in DIR'
+    )
+    arg_parser.add_argument(
+        '--format',
+        choices=list(FORMATS),
+        default='csv',
+        help='format of the master and concise files (default: csv)'
+    )
+    arg_parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='print the time, rows and peak memory of every stage, parser and file and write them to Profile_<date>.json'
+    )
+    arg_parser.add_argument(
+        '--cprofile',
+        metavar='PATH',
+        help='also dump cProfile statistics of the run to PATH, parsing in worker processes is not included'
+    )
+    arg_parser.add_argument(
+        '--stream',
+        type=int,
+        metavar='ROWS',
+        help='only create the concise summary, reading the files in chunks of ROWS rows without building the master'
+    )
+    arg_parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='keep running and rebuild the master and concise summary when the broker folders change'
+    )
+    arg_parser.add_argument(
+        '--quotes',
+        metavar='PATH',
+        help='reprice the master with the symbols and prices of a CSV or Parquet quotes file'
+    )
+    arg_parser.add_argument(
+        '--engine',
+        choices=list(ENGINES),
+        default='c',
+        help='reader of the CSV files: the pandas C parser or the multithreaded pyarrow reader (default: c)'
+    )
+    args = arg_parser.parse_args()
 
-        main()
-    except Exception as e:
-        with open('error.log', 'w', encoding='utf-8') as error_file:
-            error_file.write(str(e))
-            traceback.print_exc()
+    if args.watch:
+        # Imported here, the watcher imports this module
+        from Summary_Watcher import watch
+        try:
+            watch(
+                workers=args.workers,
+                build=partial(
+                    main,
+                    write_master=not args.no_master_csv,
+                    snapshot_store=args.snapshot_store,
+                    output_format=args.format,
+                    profile=args.profile,
+                    quotes=args.quotes,
+                    engine=args.engine
+                )
+            )
+        except KeyboardInterrupt:
+            pass
+    else:
+        try:
+            if os.path.exists('error.log'):
+                os.remove("error.log")
+
+            failures: List[ParseFailure] = []
+            if args.stream is not None:
+                run = partial(main_streaming, args.stream, args.format)
+            else:
+                run = partial(
+                    main,
+                    workers=args.workers,
+                    cache=None if args.no_cache else StatementCache(
+                        args.cache_dir,
+                        max_bytes=args.cache_size * 1024 * 1024,
+                        # Parser changes invalidate the cache
+                        version=file_hash(__file__)
+                    ),
+                    write_master=not args.no_master_csv,
+                    concise=args.concise,
+                    snapshot_store=args.snapshot_store,
+                    output_format=args.format,
+                    profile=args.profile,
+                    quotes=args.quotes,
+                    engine=args.engine,
+                    failures=failures
+                )
+
+            if args.cprofile is not None:
+                # Imported here, only needed for the dump
+                import cProfile
+                cProfile.runctx('run()', globals(), {'run': run}, args.cprofile)
+            else:
+                run()
+        except Exception as e:
+            with open('error.log', 'w', encoding='utf-8') as error_file:
+                error_file.write(str(e))
+                traceback.print_exc()
+            sys.exit(1)
+
+        if len(failures) > 0:
+            sys.exit(1)
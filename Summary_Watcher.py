@@ -0,0 +1,111 @@
+import time
+import traceback
+from os import stat
+from os.path import isdir
+from typing import Callable, Dict, Optional, Tuple
+
+import Summary_Maker
+from Statement_Cache import MemoryStatementCache
+
+# Size and mtime of every watched file by path
+FolderState = Dict[str, Tuple[int, int]]
+
+
+def folder_state(paths: Dict[str, str]) -> FolderState:
+    """Get the size and mtime of every file in the broker folders.
+
+    Args:
+        paths (Dict[str, str]): Folder of every broker.
+
+    Returns:
+        FolderState: Size and mtime of every file by path.
+    """
+    state: FolderState = {}
+    for path in paths.values():
+        if not isdir(path):
+            continue
+        for f in Summary_Maker.list_files(path):
+            try:
+                file_stat = stat(f)
+            except OSError:
+                # Removed while listing
+                continue
+            state[f] = (file_stat.st_size, file_stat.st_mtime_ns)
+    return state
+
+
+def watch(
+        paths: Optional[Dict[str, str]] = None,
+        workers: int = 1,
+        concise: bool = True,
+        interval: float = 0.2,
+        debounce: float = 0.5,
+        build: Optional[Callable[..., None]] = None
+    ):
+    """Rebuild the summaries every time files are added to, changed in or removed from the broker folders.
+
+    The process stays alive between builds and keeps the parsed frames in memory, so a rebuild
+    only parses the files that changed. Bursts of changes are collected into one rebuild by
+    waiting until the folders have been quiet for the debounce time. The folders are watched
+    with inotify if inotify_simple is installed, else they are polled.
+
+    Args:
+        paths (Optional[Dict[str, str]], optional): Folder of every broker. Defaults to the folders in the
+            current directory.
+        workers (int, optional): Number of processes used to parse the files. Defaults to 1.
+        concise (bool, optional): Also rebuild the concise summary. Defaults to True.
+        interval (float, optional): Seconds between two checks of the folders. Defaults to 0.2.
+        debounce (float, optional): Seconds without changes before rebuilding. Defaults to 0.5.
+        build (Optional[Callable[..., None]], optional): Builds the summaries, called with the workers, cache
+            and concise keywords. Defaults to Summary_Maker.main.
+    """
+    if paths is None:
+        paths = Summary_Maker.DEFAULT_PATHS
+    if build is None:
+        build = Summary_Maker.main
+
+    cache = MemoryStatementCache()
+    wait = _waiter(paths, interval)
+
+    state: Optional[FolderState] = None
+    while True:
+        new_state = folder_state(paths)
+        if new_state != state:
+            # Wait for the burst of changes to end
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < debounce:
+                wait()
+                latest = folder_state(paths)
+                if latest != new_state:
+                    new_state = latest
+                    quiet_since = time.monotonic()
+
+            for f in set(state or {}) - set(new_state):
+                cache.discard(f)
+            state = new_state
+
+            cache.hits = cache.misses = 0
+            start = time.perf_counter()
+            try:
+                build(workers=workers, cache=cache, concise=concise)
+                print(f'Rebuilt the summaries in {time.perf_counter() - start:.2f}s')
+            except Exception:
+                traceback.print_exc()
+
+        wait()
+
+
+def _waiter(paths: Dict[str, str], interval: float) -> Callable[[], None]:
+    """Get a function that blocks until a folder changes or the interval is over."""
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return lambda: time.sleep(interval)
+
+    inotify = INotify()
+    watch_flags = flags.CREATE | flags.CLOSE_WRITE | flags.MODIFY | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+    for path in paths.values():
+        if isdir(path):
+            inotify.add_watch(path, watch_flags)
+
+    return lambda: inotify.read(timeout=int(interval * 1000))
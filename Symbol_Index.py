@@ -0,0 +1,111 @@
+import os
+from os.path import isfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# File of the index in the folder of the summaries
+INDEX_FILE: str = 'symbol_index.csv'
+
+EQUITY: str = 'Equity'
+OPTION: str = 'Option'
+CASH: str = 'Cash'
+MONEY_MARKET: str = 'Money Market'
+CRYPTO: str = 'Crypto'
+PRIVATE_PLACEMENT: str = 'Private Placement'
+
+# Upper case symbols of crypto currencies
+CRYPTO_SYMBOLS = frozenset({'BTC', 'ETH', 'LTC', 'BCH', 'DOGE', 'SOL', 'ADA', 'DOT', 'XRP', 'USDC', 'USDT'})
+
+# Lower case names of the accounts that only hold crypto currencies or private placements
+CRYPTO_ACCOUNTS = ('kraken', 'coinbase')
+PRIVATE_PLACEMENT_ACCOUNTS = ('dealmaker',)
+
+
+class SymbolIndex:
+    """Type of every symbol: equity, option, cash, money market, crypto or private placement.
+
+    Symbols are classified by rules the first time they are seen and kept in a CSV file, so
+    later runs only classify new symbols. Types corrected by hand in the file are kept.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path (Optional[str], optional): CSV file of the index. Defaults to None (only in memory).
+        """
+        self.path: Optional[str] = path
+        self._types: pd.Series = pd.Series(dtype=object)
+        self._changed: bool = False
+
+        if path is not None and isfile(path):
+            index = pd.read_csv(path, dtype=str, keep_default_na=False)
+            self._types = pd.Series(index['Type'].values, index=index['Symbol'].values, dtype=object)
+
+    def learn(self, symbols: pd.Series, descriptions: pd.Series, accounts: pd.Series):
+        """Classify the symbols that are not in the index yet.
+
+        A symbol gets the first type a row of it matches, in the order cash, money market,
+        option, crypto, private placement, else it is an equity.
+
+        Args:
+            symbols (pd.Series): Symbol of every position row.
+            descriptions (pd.Series): Description of every row.
+            accounts (pd.Series): Account of every row.
+        """
+        new = ~symbols.isin(self._types.index)
+        if not new.any():
+            return
+
+        # The rules only need every distinct row once, positions repeat across lots and accounts
+        rows = pd.DataFrame({
+            'symbol': symbols[new].astype(object).astype(str).to_numpy(),
+            'description': descriptions[new].astype(object).fillna('').astype(str).to_numpy(),
+            'account': accounts[new].astype(object).fillna('').astype(str).to_numpy()
+        }).drop_duplicates()
+
+        symbol = rows['symbol']
+        lower = symbol.str.lower()
+        description = rows['description'].str.lower()
+        account = rows['account'].str.lower()
+
+        rules = pd.DataFrame({
+            CASH: lower.str.contains('cash', regex=False) | (lower == 'pending activity'),
+            MONEY_MARKET: symbol.str.endswith('**') | description.str.contains('money market', regex=False),
+            # Option symbols hold the expiry date and strike price
+            OPTION: symbol.str.contains('[0-9]', regex=True),
+            CRYPTO: symbol.str.upper().isin(CRYPTO_SYMBOLS) | account.str.contains('|'.join(CRYPTO_ACCOUNTS)),
+            PRIVATE_PLACEMENT: account.str.contains('|'.join(PRIVATE_PLACEMENT_ACCOUNTS))
+        }, index=symbol.index)
+
+        # A symbol matches a rule if any of its rows does
+        matches = rules.groupby(symbol.values, sort=False).any()
+        types = pd.Series(
+            np.select([matches[column].to_numpy() for column in rules.columns], list(rules.columns), EQUITY),
+            index=matches.index,
+            dtype=object
+        )
+
+        self._types = pd.concat([self._types, types])
+        self._changed = True
+
+    def types(self, symbols: pd.Index) -> pd.Series:
+        """Get the type of symbols.
+
+        Args:
+            symbols (pd.Index): The symbols.
+
+        Returns:
+            pd.Series: Type of every symbol, indexed by symbol. Symbols that were never learned are equities.
+        """
+        return self._types.reindex(symbols).fillna(EQUITY)
+
+    def save(self):
+        """Write the index if it has a file and new symbols were classified."""
+        if self.path is None or not self._changed:
+            return
+
+        pd.DataFrame({'Symbol': self._types.index, 'Type': self._types.values}).to_csv(self.path + '.tmp', index=False)
+        os.replace(self.path + '.tmp', self.path)
+        self._changed = False
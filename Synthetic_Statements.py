@@ -0,0 +1,228 @@
+import os
+import random
+from os.path import join
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Symbols the synthetic positions are drawn from, options have digits in them
+SYMBOLS: List[str] = [
+    'AAPL', 'MSFT', 'GOOG', 'AMZN', 'TSLA', 'VTI', 'XOM', 'SHOP', 'RY', 'TD',
+    '-AAPL220121C150', '-SPY230317P400'
+]
+
+
+def write_fidelity(path: str, rows: int, seed: int = 0):
+    """Write a Fidelity positions CSV export.
+
+    The table starts at the first row, every row ends with a trailing comma and the table
+    is followed by a blank row and the disclaimers.
+
+    Args:
+        path (str): Path of the file to write.
+        rows (int): Number of positions.
+        seed (int, optional): Seed of the random positions. Defaults to 0.
+    """
+    generator = random.Random(seed)
+    account = 'Z%07d' % seed
+
+    lines: List[str] = [
+        'Account Number,Account Name,Symbol,Description,Quantity,Last Price,Last Price Change,'
+        'Current Value,Today\'s Gain/Loss Dollar,Today\'s Gain/Loss Percent,Total Gain/Loss Dollar,'
+        'Total Gain/Loss Percent,Percent Of Account,Cost Basis Total,Average Cost Basis,Type',
+        f'{account},Individual,SPAXX**,HELD IN MONEY MARKET,,,,$1234.56,,,,,1.23%,,,Cash,'
+    ]
+    for _ in range(rows):
+        quantity, price, cost = _position(generator)
+        symbol = generator.choice(SYMBOLS)
+        gain = (price - cost) * quantity
+        lines.append(
+            f'{account},Individual,{symbol},{symbol} INC,{quantity},${price:.2f},+$0.10,'
+            f'${price * quantity:.2f},+$1.00,+0.10%,{_signed_dollars(gain)},'
+            f'{(price - cost) / cost * 100:+.2f}%,0.50%,${cost * quantity:.2f},${cost:.2f},Cash,'
+        )
+    lines.append(f'{account},Individual,Pending Activity,Pending Activity,,,,$-12.00,,,,,,,,,')
+    lines += [
+        '',
+        '"The data and information in this spreadsheet is provided to you solely for your use."',
+        '"Date downloaded 01/03/2022 9:00 AM ET"'
+    ]
+
+    _write_lines(path, lines)
+
+
+def write_etrade(path: str, rows: int, seed: int = 0, no_positions: bool = False):
+    """Write an Etrade portfolio CSV export.
+
+    The account summary block is followed by the position table, which ends with a TOTAL row.
+
+    Args:
+        path (str): Path of the file to write.
+        rows (int): Number of positions.
+        seed (int, optional): Seed of the random positions. Defaults to 0.
+        no_positions (bool, optional): Add the row Etrade puts in the table of an account
+            without positions. Defaults to False.
+    """
+    generator = random.Random(seed)
+
+    lines: List[str] = [
+        'Account Summary',
+        'Account,Net Account Value,Total Gain $,Total Gain %,Day\'s Gain Unrealized $,'
+        'Day\'s Gain Unrealized %,Available For Withdrawal,Cash Purchasing Power',
+        f'Brokerage -{seed % 10000:04d},10000,100,1,10,0.1,500,500',
+        '',
+        'View Summary - All Positions',
+        'Symbol,Qty #,Last Price $,Value $,Change $,Total Gain $,Change %,Total Gain %,'
+        'Day\'s Gain $,Price Paid $,Day\'s Gain %,Cost Basis $'
+    ]
+    if no_positions:
+        lines.append('There are no positions in this account.')
+    for _ in range(rows):
+        quantity, price, cost = _position(generator)
+        lines.append(
+            f'{generator.choice(SYMBOLS)},{quantity},{price:.2f},{price * quantity:.2f},0.10,'
+            f'{(price - cost) * quantity:.2f},0.10,{(price - cost) / cost * 100:.2f},1.00,'
+            f'{cost:.2f},0.10,{cost * quantity:.2f}'
+        )
+    lines.append('CASH,,,500.25,,,,,,,,')
+    lines.append('TOTAL,,,10000.00,,100.00,,1.00,,,,')
+    lines += ['', 'Generated at 01/03/2022 09:00 AM ET']
+
+    _write_lines(path, lines)
+
+
+def write_canaccord(path: str, rows: int, seed: int = 0, excel: bool = True):
+    """Write a Canaccord holdings export as a workbook or a CSV file.
+
+    The table header is on the 11th row and the first column is empty.
+
+    Args:
+        path (str): Path of the file to write.
+        rows (int): Number of positions.
+        seed (int, optional): Seed of the random positions. Defaults to 0.
+        excel (bool, optional): Write a .xlsx workbook instead of a CSV file. Defaults to True.
+    """
+    generator = random.Random(seed)
+    account = f'CAN-{seed}'
+
+    table: List[List[Optional[object]]] = [[None] * 22 for _ in range(10)]
+    table[0][1] = 'Canaccord Genuity Holdings Report'
+    table.append(
+        [None, 'Symbol', 'Class', 'Account', 'Type', 'Description', 'Currency', 'Quantity',
+         'Price', 'Book Value', 'ACB', 'Gain', 'Gain %', 'Market Value'] +
+        [f'Column {i}' for i in range(8)]
+    )
+    for _ in range(rows):
+        quantity, price, _ = _position(generator)
+        symbol = generator.choice(SYMBOLS)
+        table.append(
+            [None, symbol, 'A', account, 'Cash', f'{symbol} Corp', 'CAD', quantity,
+             f'${price:.2f}', None, None, None, None, f'${price * quantity:,.2f}'] + [None] * 8
+        )
+    table.append(
+        [None, 'USD999997', 'A', account, 'Cash', 'US Dollar Cash', 'USD', 100, '$1.00',
+         None, None, None, None, '$100.00'] + [None] * 8
+    )
+
+    if excel:
+        pd.DataFrame(table).to_excel(path, header=False, index=False)
+    else:
+        pd.DataFrame(table).to_csv(path, header=False, index=False)
+
+
+def write_schwab(path: str, rows: int, seed: int = 0):
+    """Write a Schwab positions CSV export.
+
+    Every cell is quoted, the account is named in the first row and the table ends with an
+    Account Total row.
+
+    Args:
+        path (str): Path of the file to write.
+        rows (int): Number of positions.
+        seed (int, optional): Seed of the random positions. Defaults to 0.
+    """
+    generator = random.Random(seed)
+
+    def quoted(cells: List[object]) -> str:
+        return ','.join(f'"{cell}"' for cell in cells)
+
+    lines: List[str] = [
+        quoted([f'Positions for account Individual ...{seed % 1000:03d} as of 09:00 PM ET, 2022/01/03']),
+        '',
+        quoted(['Symbol', 'Description', 'Quantity', 'Price', 'Price Change $', 'Price Change %',
+                'Market Value', 'Day Change $', 'Day Change %', 'Cost Basis', 'Gain/Loss %',
+                'Gain/Loss $', 'Ratings', 'Reinvest Dividends?', 'Capital Gains?', '% Of Account',
+                'Security Type'])
+    ]
+    for _ in range(rows):
+        quantity, price, cost = _position(generator)
+        symbol = generator.choice(SYMBOLS)
+        lines.append(quoted([
+            symbol, f'{symbol} INC', quantity, f'${price:.2f}', '$0.10', '0.10%',
+            f'${price * quantity:,.2f}', '$1.00', '0.10%', f'${cost * quantity:,.2f}',
+            f'{(price - cost) / cost * 100:.2f}%', f'${abs(price - cost) * quantity:,.2f}',
+            'B', 'No', 'N/A', '0.50%', 'Equity'
+        ]))
+    lines.append(quoted(['Cash & Cash Investments', '--', '--', '--', '--', '--', '$500.00',
+                         '$0.00', '0%', '--', '--', '--', '--', '--', '--', '5%',
+                         'Cash and Money Market']))
+    lines.append(quoted(['Account Total', '--', '--', '--', '--', '--', '$99,999.00', '$0.00',
+                         '0%', '--', '--', '--', '--', '--', '--', '--', '--']))
+
+    _write_lines(path, lines)
+
+
+def write_portfolio(root: str, rows: int, files: int = 1, seed: int = 0) -> Dict[str, List[str]]:
+    """Write a portfolio folder with synthetic exports of every supported broker.
+
+    Args:
+        root (str): Folder to write the broker folders in.
+        rows (int): Number of positions per file.
+        files (int, optional): Number of files per broker. Defaults to 1.
+        seed (int, optional): Seed of the first file. Defaults to 0.
+
+    Returns:
+        Dict[str, List[str]]: Paths of the written files by broker folder.
+    """
+    written: Dict[str, List[str]] = {}
+
+    for folder in ['Fidelity', 'Etrade', 'Canaccord', 'Schwab']:
+        os.makedirs(join(root, folder), exist_ok=True)
+        written[folder] = []
+
+    for i in range(files):
+        file_seed = seed + i
+
+        path = join(root, 'Fidelity', f'Portfolio_Positions_{i}.csv')
+        write_fidelity(path, rows, file_seed)
+        written['Fidelity'].append(path)
+
+        path = join(root, 'Etrade', f'PortfolioDownload_{i}.csv')
+        write_etrade(path, rows, file_seed, no_positions=(i % 2 == 1))
+        written['Etrade'].append(path)
+
+        # Alternate between workbooks and CSV exports
+        excel = i % 2 == 0
+        path = join(root, 'Canaccord', f'Holdings_{i}.' + ('xlsx' if excel else 'csv'))
+        write_canaccord(path, rows, file_seed, excel=excel)
+        written['Canaccord'].append(path)
+
+        path = join(root, 'Schwab', f'Individual-Positions-{i}.csv')
+        write_schwab(path, rows, file_seed)
+        written['Schwab'].append(path)
+
+    return written
+
+
+def _position(generator: random.Random):
+    return (generator.randint(1, 500), round(generator.uniform(1, 400), 2),
+            round(generator.uniform(1, 400), 2))
+
+
+def _signed_dollars(amount: float) -> str:
+    return f'+${amount:.2f}' if amount >= 0 else f'-${-amount:.2f}'
+
+
+def _write_lines(path: str, lines: List[str]):
+    with open(path, 'w', encoding='ascii', newline='') as fw:
+        fw.write('\n'.join(lines) + '\n')
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The modules are flat files at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Synthetic_Statements import write_portfolio  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def portfolio(tmp_path_factory) -> str:
+    """Folder of a synthetic portfolio with two exports of every broker."""
+    root = str(tmp_path_factory.mktemp('portfolio'))
+    write_portfolio(root, rows=50, files=2)
+    return root
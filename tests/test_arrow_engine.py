@@ -0,0 +1,99 @@
+from typing import List, Optional
+
+import pandas as pd
+import pytest
+
+import Summary_Maker
+from Summary_Maker import LAYOUT_READERS
+from Synthetic_Statements import write_fidelity, write_schwab
+
+pytest.importorskip('pyarrow')
+
+ROWS: int = 40
+
+
+@pytest.fixture
+def arrow_tables(monkeypatch) -> List[Optional[pd.DataFrame]]:
+    """Tables returned by the arrow reader, None for the tables it left to the C parser."""
+    tables: List[Optional[pd.DataFrame]] = []
+    read_arrow_table = Summary_Maker._read_arrow_table
+
+    def record(*args, **kwargs):
+        table = read_arrow_table(*args, **kwargs)
+        tables.append(table)
+        return table
+
+    monkeypatch.setattr(Summary_Maker, '_read_arrow_table', record)
+    return tables
+
+
+def _assert_same_as_c(broker: str, f: str):
+    reader = LAYOUT_READERS[broker]
+    pd.testing.assert_frame_equal(
+        Summary_Maker.concat_master([reader.parse(f, 'arrow')]),
+        Summary_Maker.concat_master([reader.parse(f, 'c')])
+    )
+
+
+def _edit_lines(f: str, edit):
+    with open(f, 'rb') as fr:
+        lines = fr.read().split(b'\n')
+    edit(lines)
+    with open(f, 'wb') as fw:
+        fw.write(b'\n'.join(lines))
+
+
+def test_arrow_master_matches_c_master(portfolio):
+    paths = Summary_Maker.portfolio_paths(portfolio)
+
+    pd.testing.assert_frame_equal(
+        Summary_Maker.build_master(paths, engine='arrow'),
+        Summary_Maker.build_master(paths, engine='c')
+    )
+
+
+def test_arrow_reads_plain_table(tmp_path, arrow_tables):
+    f = str(tmp_path / 'positions.csv')
+    write_schwab(f, ROWS)
+
+    _assert_same_as_c('schwab', f)
+    assert len(arrow_tables) == 1 and arrow_tables[0] is not None
+
+
+def test_short_row_falls_back_to_c(tmp_path, arrow_tables):
+    f = str(tmp_path / 'Portfolio_Positions.csv')
+    write_fidelity(f, ROWS)
+
+    def cut_row(lines: List[bytes]):
+        # Only the account, name, symbol and description of a position
+        lines[5] = b','.join(lines[5].split(b',')[0:4])
+    _edit_lines(f, cut_row)
+
+    _assert_same_as_c('fidelity', f)
+    assert arrow_tables == [None]
+
+
+def test_non_ascii_bytes_fall_back_to_c(tmp_path, arrow_tables):
+    f = str(tmp_path / 'Portfolio_Positions.csv')
+    write_fidelity(f, ROWS)
+
+    def add_accent(lines: List[bytes]):
+        lines[3] = lines[3].replace(b' INC', ' SOCIÉTÉ'.encode('utf-8'), 1)
+    _edit_lines(f, add_accent)
+
+    _assert_same_as_c('fidelity', f)
+    assert arrow_tables == []
+
+
+def test_chunked_read_matches_whole_arrow_read(tmp_path, arrow_tables):
+    f = str(tmp_path / 'positions.csv')
+    write_schwab(f, ROWS)
+    reader = LAYOUT_READERS['schwab']
+
+    chunks = list(reader.read(f, chunksize=7, engine='arrow'))
+
+    assert len(chunks) > 1 and arrow_tables == []
+    pd.testing.assert_frame_equal(
+        Summary_Maker.concat_master(chunks),
+        Summary_Maker.concat_master([reader.parse(f, 'arrow')])
+    )
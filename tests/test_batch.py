@@ -0,0 +1,27 @@
+import os
+import shutil
+
+import Batch_Summaries
+
+
+def _copy(portfolio: str, root: str) -> str:
+    # Only the broker folders, without the outputs of other tests
+    shutil.copytree(portfolio, root, ignore=shutil.ignore_patterns(
+        'Summary_Master_*', 'Concise_*', '.summary_cache', 'symbol_index.csv', 'parse_failures.json'))
+    return root
+
+
+def test_missing_and_empty_roots_do_not_stop_the_batch(portfolio, tmp_path):
+    good = _copy(portfolio, str(tmp_path / 'good'))
+    empty = str(tmp_path / 'empty')
+    os.mkdir(empty)
+    missing = str(tmp_path / 'missing')
+
+    for workers in (1, 2):
+        results = Batch_Summaries.run_batch([missing, good, empty], workers=workers, cache=False)
+
+        assert [result.root for result in results] == [missing, good, empty]
+        assert results[0].error is not None and not os.path.exists(missing)
+        assert results[1].error is None and results[1].files == 8 and results[1].rows > 0
+        assert results[2].error is not None
+        assert not os.path.exists(os.path.join(empty, 'error.log'))
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+import Concise_Maker
+import Summary_Maker
+from Summary_Maker import MasterColums
+
+# Columns of the concise summary the per-symbol loop computes, it leaves the types empty
+LOOP_COLUMNS: int = 10
+
+
+def loop_concise(concise, master):
+    """The concise summary computed one symbol at a time, as it was before the groupby pass."""
+    symbols = master.Symbol.unique()
+    symbols = [symbol for symbol in symbols if type(symbol) is str]
+    totalValue = pd.to_numeric(master[master.columns[5]]).sum()
+
+    rows = []
+    for symbol in symbols:
+        rowsOfSymbol = master.loc[master[master.columns[1]] == symbol]
+        des = [d for d in rowsOfSymbol[master.columns[2]] if d != ""]
+        quan = float(rowsOfSymbol[master.columns[3]].sum())
+
+        lpIndex = pd.to_numeric(rowsOfSymbol[master.columns[4]]).idxmin()
+        if type(lpIndex) is float:
+            lp = "n/a"
+        else:
+            lp = master.at[int(lpIndex), master.columns[4]]
+
+        val = float(pd.to_numeric(rowsOfSymbol[master.columns[5]]).sum())
+        cbt = float(pd.to_numeric(rowsOfSymbol[master.columns[9]]).sum())
+
+        if quan != 0:
+            cba = cbt / quan
+            if any(char.isdigit() for char in symbol):
+                cba /= 100
+        else:
+            cba = "n/a"
+
+        tgld = val - cbt
+        tglp = "n/a" if cbt == 0 else ((val - cbt) / cbt) * 100
+        ps = (val / totalValue) * 100
+
+        rows.append([symbol, des[0], quan, lp, val, tgld, tglp, cba, cbt, ps])
+
+    return pd.DataFrame(rows, columns=concise.columns[0:LOOP_COLUMNS])
+
+
+def test_groupby_concise_matches_symbol_loop(portfolio, tmp_path):
+    master = Summary_Maker.build_master(Summary_Maker.portfolio_paths(portfolio))
+
+    # A symbol without any last price and an option held in two rows
+    extra = pd.DataFrame({
+        MasterColums.ACCOUNT_NAME.value: ['Private', 'Private', 'Options', 'Options'],
+        MasterColums.SYMBOL.value: ['NOPRICE', 'NOPRICE', '-QQQ240119C400', '-QQQ240119C400'],
+        MasterColums.DESCRIPTION.value: ['NO PRICE LP', 'NO PRICE LP', 'QQQ CALL', 'QQQ CALL'],
+        MasterColums.QUANTITY.value: [5.0, 3.0, 2.0, 1.0],
+        MasterColums.LAST_PRICE.value: [np.nan, np.nan, 4.5, 4.25],
+        MasterColums.CURRENT_VALUE.value: [100.0, 60.0, 900.0, 425.0],
+        MasterColums.TOTAL_COST_BASIS.value: [50.0, 30.0, 700.0, 0.0]
+    })
+    master = pd.concat([master.astype(object), extra], ignore_index=True)
+    path = str(tmp_path / 'Summary_Master_Jan-03-2022.csv')
+    Summary_Maker.export_master(master, str(tmp_path / 'Summary_Master_Jan-03-2022'), 'csv')
+
+    baseline = pd.read_csv(path, usecols=np.arange(0, 10))
+    expected = loop_concise(Concise_Maker.empty_concise(baseline), baseline)
+    actual = Concise_Maker.build_concise(Concise_Maker.read_master(path))
+
+    assert 'NOPRICE' in set(expected[expected.columns[0]])
+    assert expected.loc[expected[expected.columns[0]] == 'NOPRICE', expected.columns[3]].iloc[0] == 'n/a'
+    pd.testing.assert_frame_equal(actual.iloc[:, 0:LOOP_COLUMNS].astype(object), expected.astype(object))
+
+
+def test_chunked_concise_matches_concise(portfolio):
+    paths = Summary_Maker.portfolio_paths(portfolio)
+    expected = Concise_Maker.build_concise(Summary_Maker.build_master(paths))
+    # Chunks smaller than the files, so symbols are folded across chunks and files
+    actual = Concise_Maker.build_concise_chunked(Summary_Maker.iter_master_chunks(paths, chunksize=7))
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False, check_exact=False)
@@ -0,0 +1,66 @@
+import pytest
+
+import Summary_Maker
+from Summary_Maker import MasterColums
+
+
+def _write_sprott(folder) -> str:
+    folder.mkdir(exist_ok=True)
+    f = folder / 'sprott.csv'
+    f.write_text(
+        'Sprott Statement\n'
+        'Account: 123456789-ABCDEFG\n'
+        'Description,Symbol,Quantity,Price,Value,Change,Change %,Weight,Cost,Total Cost\n'
+        'PHYSICAL GOLD TRUST,PHYS,10,$15.00,$150.00*,,,,$12.00,$120.00\n'
+    )
+    return str(f)
+
+
+def _write_ameritrade(folder) -> str:
+    folder.mkdir(exist_ok=True)
+    f = folder / 'Positions_123456789012X.csv'
+    f.write_text(
+        'Description,Quantity,Change,Cost Per Share,Cost,Change %,Price,Value,Gain $,Gain %\n'
+        'APPLE INC (AAPL),10,0,$100.00,$1000.00,0,$150.00,$1500.00,$500.00,50.00%\n'
+        'Total,,,,,,,$1500.00,,\n'
+    )
+    return str(f)
+
+
+def test_sprott_file_parser_warns_and_parses(tmp_path):
+    f = _write_sprott(tmp_path)
+
+    with pytest.warns(DeprecationWarning):
+        frame = Summary_Maker.parse_sprott_file(f)
+
+    assert list(frame[MasterColums.SYMBOL.value]) == ['PHYS']
+    assert list(frame[MasterColums.CURRENT_VALUE.value]) == [150.0]
+
+
+def test_ameritrade_file_parser_warns_and_parses(tmp_path):
+    f = _write_ameritrade(tmp_path)
+
+    with pytest.warns(DeprecationWarning):
+        frame = Summary_Maker.parse_ameritrade_file(f)
+
+    assert list(frame[MasterColums.SYMBOL.value]) == ['AAPL']
+
+
+def test_sprott_folder_parser_warns_and_parses(tmp_path, monkeypatch):
+    _write_sprott(tmp_path / Summary_Maker.pathSprott)
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.warns(DeprecationWarning):
+        frames = Summary_Maker.parse_sprott()
+
+    assert [list(frame[MasterColums.SYMBOL.value]) for frame in frames] == [['PHYS']]
+
+
+def test_ameritrade_folder_parser_warns_and_parses(tmp_path, monkeypatch):
+    _write_ameritrade(tmp_path / Summary_Maker.pathAmeritrade)
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.warns(DeprecationWarning):
+        frames = Summary_Maker.parse_ameritrade()
+
+    assert [list(frame[MasterColums.SYMBOL.value]) for frame in frames] == [['AAPL']]
@@ -0,0 +1,46 @@
+import csv
+
+import pandas as pd
+import pytest
+
+from Summary_Maker import LAYOUT_READERS, MasterColums, resolve_engine
+from Synthetic_Statements import write_fidelity
+
+
+@pytest.mark.parametrize('engine', ['c', 'arrow'])
+def test_percent_signs_are_removed_from_text(tmp_path, engine):
+    if resolve_engine(engine) != engine:
+        pytest.skip('pyarrow is not installed')
+    f = str(tmp_path / 'Portfolio_Positions.csv')
+    write_fidelity(f, 5)
+    with open(f) as fr:
+        lines = fr.read().split('\n')
+    lines[2] = lines[2].replace(' INC,', ' 0.00000% 03/15/2022,', 1)
+    with open(f, 'w') as fw:
+        fw.write('\n'.join(lines))
+
+    frame = LAYOUT_READERS['fidelity'].parse(f, engine)
+
+    assert frame[MasterColums.DESCRIPTION.value].iloc[1].endswith(' 0.00000 03/15/2022')
+    assert not frame[MasterColums.DESCRIPTION.value].astype(str).str.contains('%').any()
+
+
+def test_workbook_with_numeric_account_number(tmp_path):
+    csv_file = str(tmp_path / 'Portfolio_Positions.csv')
+    write_fidelity(csv_file, 5)
+    with open(csv_file) as fr:
+        rows = [row[0:16] for row in csv.reader(fr)][0:8]
+    # Excel keeps the account numbers and quantities as numbers and the rates of the descriptions as text
+    for row in rows[1:]:
+        row[0] = 1234567
+        row[4] = int(row[4]) if row[4] != '' else None
+    rows[2][3] = 'US TREAS BILL 0.00000% 03/15/2022'
+    f = str(tmp_path / 'Portfolio_Positions.xlsx')
+    pd.DataFrame(rows[1:], columns=rows[0]).to_excel(f, index=False)
+
+    frame = LAYOUT_READERS['fidelity'].parse(f)
+
+    accounts = frame[MasterColums.ACCOUNT_NAME.value]
+    assert (accounts == '1234567 Individual').all()
+    assert frame[MasterColums.DESCRIPTION.value].iloc[1] == 'US TREAS BILL 0.00000 03/15/2022'
+    assert frame[MasterColums.QUANTITY.value].notna().all()
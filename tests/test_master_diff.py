@@ -0,0 +1,32 @@
+import Master_Diff
+import Summary_Maker
+from Summary_Maker import MasterColums
+
+ACCOUNT = MasterColums.ACCOUNT_NAME.value
+
+
+def test_diff_of_built_masters_finds_removed_account(portfolio):
+    master = Summary_Maker.build_master(Summary_Maker.portfolio_paths(portfolio))
+    account = master[ACCOUNT].iloc[0]
+    positions = master.loc[master[ACCOUNT] == account, [ACCOUNT, MasterColums.SYMBOL.value]].drop_duplicates()
+
+    diff = Master_Diff.diff_masters(master, master[master[ACCOUNT] != account])
+
+    assert (diff[Master_Diff.CHANGE_COLUMN] == Master_Diff.REMOVED).all()
+    assert diff.shape[0] == positions.shape[0]
+    assert (diff[ACCOUNT] == account).all()
+
+
+def test_diff_of_built_masters_finds_removed_rows(portfolio):
+    master = Summary_Maker.build_master(Summary_Maker.portfolio_paths(portfolio))
+
+    diff = Master_Diff.diff_masters(master, master.iloc[:-3])
+
+    assert list(diff[Master_Diff.CHANGE_COLUMN]) == [Master_Diff.REMOVED] * 3
+
+
+def test_positions_only_holds_real_positions(portfolio):
+    master = Summary_Maker.build_master(Summary_Maker.portfolio_paths(portfolio))
+    keys = master[Master_Diff.KEY_COLUMNS].astype(object).drop_duplicates()
+
+    assert Master_Diff._positions(master).shape[0] == keys.shape[0]
@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+from os.path import join
+from typing import List
+
+import pandas as pd
+
+import Summary_Maker
+from Statement_Cache import StatementCache
+
+
+def _run(root: str, failures: List[Summary_Maker.ParseFailure]):
+    cache = StatementCache(join(root, '.summary_cache'))
+    master = Summary_Maker.main(cache=cache, root=root, failures=failures)
+    return master, cache
+
+
+def test_malformed_file_is_reported_and_rerun_resumes(portfolio, tmp_path):
+    root = str(tmp_path / 'portfolio')
+    shutil.copytree(portfolio, root)
+    clean = Summary_Maker.build_master(Summary_Maker.portfolio_paths(root))
+    broken = join(Summary_Maker.portfolio_paths(root)['schwab'], 'broken.csv')
+    with open(broken, 'w') as fw:
+        fw.write('not a statement\n')
+
+    failures: List[Summary_Maker.ParseFailure] = []
+    master, cache = _run(root, failures)
+
+    assert [failure.file for failure in failures] == [broken]
+    with open(join(root, Summary_Maker.FAILURES_FILE)) as fr:
+        report = json.load(fr)
+    assert [entry['file'] for entry in report] == [broken]
+    assert report[0]['error'] == 'ValueError'
+    # The other files still make the master
+    pd.testing.assert_frame_equal(master, clean)
+    assert (cache.hits, cache.misses) == (0, 9)
+
+    failures = []
+    master, cache = _run(root, failures)
+
+    assert (cache.hits, cache.misses) == (8, 1)
+    assert len(failures) == 1
+    pd.testing.assert_frame_equal(master, clean)
+
+    os.remove(broken)
+    failures = []
+    master, cache = _run(root, failures)
+
+    assert (cache.hits, cache.misses) == (8, 0)
+    assert failures == []
+    assert not os.path.exists(join(root, Summary_Maker.FAILURES_FILE))
+
+
+def test_parsed_files_are_kept_without_saving_the_index(portfolio, tmp_path):
+    directory = str(tmp_path / 'cache')
+    files = Summary_Maker.list_files(Summary_Maker.portfolio_paths(portfolio)['schwab'])
+
+    cache = StatementCache(directory)
+    for f in files:
+        cache.put(f, Summary_Maker.FILE_PARSERS['schwab'](f))
+
+    # A run that stopped before the index was saved
+    resumed = StatementCache(directory)
+    assert all(resumed.get(f) is not None for f in files)
+    assert resumed.hits == len(files)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import Quote_Prices
+from Summary_Maker import MasterColums
+
+
+def _master() -> pd.DataFrame:
+    return pd.DataFrame({
+        MasterColums.ACCOUNT_NAME.value: ['Options', 'Joint', 'Joint', 'Joint'],
+        MasterColums.SYMBOL.value: ['-QQQ240119C400', 'GIFT', 'AAPL', 'MSFT'],
+        MasterColums.DESCRIPTION.value: ['QQQ CALL', 'GIFTED SHARES', 'APPLE INC', 'MICROSOFT'],
+        MasterColums.QUANTITY.value: [2.0, 10.0, 4.0, 1.0],
+        MasterColums.LAST_PRICE.value: [4.0, 20.0, 150.0, 300.0],
+        MasterColums.CURRENT_VALUE.value: [800.0, 200.0, 600.0, 300.0],
+        MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value: [100.0, 200.0, 0.0, 50.0],
+        MasterColums.TOTAL_GAIN_LOSS_PERCENT.value: [14.29, np.nan, 0.0, 20.0],
+        MasterColums.TOTAL_COST_BASIS.value: [700.0, 0.0, 600.0, 250.0]
+    })
+
+
+def test_reprice_options_and_zero_cost_basis():
+    quotes = pd.Series([5.5, 25.0, 160.0], index=['-QQQ240119C400', 'GIFT', 'AAPL'])
+    master = Quote_Prices.reprice(_master(), quotes)
+
+    price = master[MasterColums.LAST_PRICE.value]
+    value = master[MasterColums.CURRENT_VALUE.value]
+    gain = master[MasterColums.TOTAL_GAIN_LOSS_DOLLAR.value]
+    percent = master[MasterColums.TOTAL_GAIN_LOSS_PERCENT.value]
+
+    # Option quotes are per share of a contract of 100
+    assert (price[0], value[0], gain[0]) == (5.5, 1100.0, 400.0)
+    assert np.isclose(percent[0], 400.0 / 700.0 * 100)
+
+    # Without a cost basis all of the value is gain and there is no percent
+    assert (price[1], value[1], gain[1]) == (25.0, 250.0, 250.0)
+    assert np.isnan(percent[1])
+
+    assert (price[2], value[2], gain[2]) == (160.0, 640.0, 40.0)
+    assert np.isclose(percent[2], 40.0 / 600.0 * 100)
+
+    # Symbols without a quote are unchanged
+    pd.testing.assert_series_equal(master.iloc[3], _master().iloc[3])
@@ -0,0 +1,79 @@
+import multiprocessing
+import pickle
+from typing import List
+
+import pytest
+
+import Summary_Maker
+from Summary_Maker import BrokerLayout, MasterColums, register_broker
+
+ROWS: int = 20
+
+
+def _is_questrade_end(columns: List[str]) -> bool:
+    return columns[0] == 'Total'
+
+
+@pytest.fixture
+def spawn():
+    """Start the worker processes like macOS and Windows do, without the registered brokers."""
+    method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method('spawn', force=True)
+    yield
+    multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.fixture
+def questrade(tmp_path):
+    """Folder of statement files of a registered broker, which is removed again afterwards."""
+    folder = tmp_path / 'Questrade'
+    folder.mkdir()
+    for i in range(3):
+        lines = ['Symbol,Quantity,Market Value'] + [f'SYM{i}{j},{j + 1},${(j + 1) * 10}.00' for j in range(ROWS)]
+        (folder / f'positions_{i}.csv').write_text('\n'.join(lines + ['Total,,$0.00', 'Downloaded today']) + '\n')
+
+    yield str(folder)
+
+    for registry in (Summary_Maker.BROKER_LAYOUTS, Summary_Maker.LAYOUT_READERS, Summary_Maker.FILE_PARSERS):
+        registry.pop('questrade', None)
+
+
+def _layout(**kwargs) -> BrokerLayout:
+    return BrokerLayout(
+        columns={
+            MasterColums.SYMBOL: 'Symbol',
+            MasterColums.QUANTITY: 'Quantity',
+            MasterColums.CURRENT_VALUE: ('Market Value', 'Value')
+        },
+        **kwargs
+    )
+
+
+def _build(folder: str):
+    failures: List[Summary_Maker.ParseFailure] = []
+    master = Summary_Maker.build_master({'questrade': folder}, workers=2, failures=failures)
+    return master, failures
+
+
+def test_registered_broker_is_parsed_by_spawned_workers(spawn, questrade):
+    register_broker('questrade', _layout(is_end=_is_questrade_end))
+
+    master, failures = _build(questrade)
+
+    assert failures == []
+    symbols = master[MasterColums.SYMBOL.value].astype(str)
+    assert symbols.str.startswith('SYM').sum() == 3 * ROWS
+
+
+def test_registered_layout_with_lambdas_is_parsed_in_main_process(spawn, questrade):
+    register_broker('questrade', _layout(is_end=lambda columns: columns[0] == 'Total'))
+
+    master, failures = _build(questrade)
+
+    assert failures == []
+    assert master[MasterColums.SYMBOL.value].astype(str).str.startswith('SYM').sum() == 3 * ROWS
+
+
+def test_built_in_layouts_can_be_pickled():
+    for broker, layout in Summary_Maker.BROKER_LAYOUTS.items():
+        assert pickle.loads(pickle.dumps(layout)) == layout, broker
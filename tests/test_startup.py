@@ -0,0 +1,16 @@
+import Benchmark
+import Summary_CLI
+
+
+def test_cli_import_stays_within_budget():
+    # Best of a few runs, the first one can pay for a cold disk cache
+    runs = [Benchmark.measure_import('Summary_CLI') for _ in range(3)]
+
+    assert min(times['Summary_CLI'] for times in runs) <= Summary_CLI.IMPORT_BUDGET_US
+
+
+def test_cli_import_does_not_load_numpy_or_pandas():
+    times = Benchmark.measure_import('Summary_CLI')
+
+    assert 'numpy' not in times
+    assert 'pandas' not in times
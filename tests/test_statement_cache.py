@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Statement_Cache
+import Summary_Maker
+from Statement_Cache import FEATHER_EXTENSION, PICKLE_EXTENSION, StatementCache
+
+
+def _cached_files(directory: str):
+    return sorted(os.path.splitext(name)[1] for name in os.listdir(directory) if name != Statement_Cache.INDEX_FILE)
+
+
+def _statement(portfolio: str) -> str:
+    folder = Summary_Maker.portfolio_paths(portfolio)['schwab']
+    return Summary_Maker.list_files(folder)[0]
+
+
+def test_parsed_frames_are_stored_as_feather(portfolio, tmp_path):
+    pytest.importorskip('pyarrow')
+    f = _statement(portfolio)
+    frame = Summary_Maker.FILE_PARSERS['schwab'](f)
+    directory = str(tmp_path / 'cache')
+
+    cache = StatementCache(directory)
+    cache.put(f, frame)
+    cache.save()
+
+    assert _cached_files(directory) == [FEATHER_EXTENSION]
+    pd.testing.assert_frame_equal(StatementCache(directory).get(f), frame.reset_index(drop=True))
+
+
+def test_frames_feather_cant_hold_are_pickled(portfolio, tmp_path):
+    f = _statement(portfolio)
+    frame = pd.DataFrame({'Symbol': ['AAPL', 1234, np.nan]})
+    directory = str(tmp_path / 'cache')
+
+    cache = StatementCache(directory)
+    cache.put(f, frame)
+    cache.save()
+
+    assert _cached_files(directory) == [PICKLE_EXTENSION]
+    pd.testing.assert_frame_equal(StatementCache(directory).get(f), frame)
+
+
+def test_frames_are_pickled_without_pyarrow(portfolio, tmp_path, monkeypatch):
+    monkeypatch.setattr(Statement_Cache, '_has_pyarrow', lambda: False)
+    f = _statement(portfolio)
+    frame = Summary_Maker.FILE_PARSERS['schwab'](f)
+    directory = str(tmp_path / 'cache')
+
+    cache = StatementCache(directory)
+    cache.put(f, frame)
+    cache.save()
+
+    assert _cached_files(directory) == [PICKLE_EXTENSION]
+    pd.testing.assert_frame_equal(StatementCache(directory).get(f), frame)
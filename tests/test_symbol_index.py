@@ -0,0 +1,60 @@
+import pandas as pd
+
+import Concise_Maker
+import Summary_Maker
+import Symbol_Index
+from Symbol_Index import SymbolIndex
+
+
+def _learn(index: SymbolIndex, symbols, descriptions, accounts):
+    index.learn(pd.Series(symbols, dtype=object), pd.Series(descriptions, dtype=object), pd.Series(accounts, dtype=object))
+
+
+def test_index_round_trips_through_its_file(tmp_path):
+    path = str(tmp_path / Symbol_Index.INDEX_FILE)
+    index = SymbolIndex(path)
+    _learn(
+        index,
+        ['AAPL', 'Cash', 'SPAXX**', '-QQQ240119C400', 'BTC', 'ACME'],
+        ['APPLE INC', '', 'FIDELITY GOVERNMENT MONEY MARKET', 'QQQ CALL', 'BITCOIN', 'ACME SAFE'],
+        ['Joint', 'Joint', 'Joint', 'Options', 'Kraken', 'DealMaker']
+    )
+    index.save()
+
+    symbols = pd.Index(['AAPL', 'Cash', 'SPAXX**', '-QQQ240119C400', 'BTC', 'ACME'])
+    expected = [
+        Symbol_Index.EQUITY, Symbol_Index.CASH, Symbol_Index.MONEY_MARKET,
+        Symbol_Index.OPTION, Symbol_Index.CRYPTO, Symbol_Index.PRIVATE_PLACEMENT
+    ]
+    assert list(SymbolIndex(path).types(symbols)) == expected
+
+    # A type corrected by hand is kept, only new symbols are classified
+    saved = pd.read_csv(path, dtype=str, keep_default_na=False)
+    saved.loc[saved['Symbol'] == 'ACME', 'Type'] = Symbol_Index.EQUITY
+    saved.to_csv(path, index=False)
+
+    index = SymbolIndex(path)
+    _learn(index, ['ACME', 'MSFT'], ['ACME SAFE', 'MICROSOFT'], ['DealMaker', 'Joint'])
+    index.save()
+
+    types = SymbolIndex(path).types(pd.Index(['ACME', 'MSFT', 'UNKNOWN']))
+    assert list(types) == [Symbol_Index.EQUITY, Symbol_Index.EQUITY, Symbol_Index.EQUITY]
+    assert len(pd.read_csv(path)) == 7
+
+
+def test_type_total_sums_the_values_of_each_type(portfolio, tmp_path):
+    path = str(tmp_path / Symbol_Index.INDEX_FILE)
+    master = Summary_Maker.build_master(Summary_Maker.portfolio_paths(portfolio))
+    index = SymbolIndex(path)
+    concise = Concise_Maker.build_concise(master, index)
+    index.save()
+
+    symbol = concise[concise.columns[0]]
+    value = pd.to_numeric(concise[concise.columns[4]])
+    types = concise[concise.columns[10]]
+
+    assert types.nunique() > 1
+    assert list(types) == list(SymbolIndex(path).types(pd.Index(symbol)))
+    expected = value.groupby(types).transform('sum')
+    pd.testing.assert_series_equal(
+        pd.to_numeric(concise[concise.columns[11]]), expected, check_names=False)